@@ -0,0 +1,269 @@
+import sys
+import os
+import subprocess
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+HEAVY_MODULES = ["pygraphviz", "flask", "bs4"]
+
+
+def importtime(module):
+    r = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                       cwd=HERE, capture_output=True, text=True, check=True)
+    total = 0
+    imported = set()
+    for line in r.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith("  "):  # only top level imports count for the total
+            total += int(cumulative)
+        imported.add(name.strip().split(".")[0])
+    return total / 1000, [m for m in HEAVY_MODULES if m in imported]
+
+
+#parse.py only prints the diagnostics, it doesn't draw the graph
+def first_diagnostic(file, env):
+    start = time.perf_counter()
+    p = subprocess.Popen([sys.executable, "parse.py", file], cwd=HERE, env=env, stdout=subprocess.PIPE, text=True)
+    p.stdout.readline()
+    elapsed = time.perf_counter() - start
+    p.stdout.read()
+    p.wait()
+    return elapsed * 1000
+
+
+def startup(file):
+    ok = True
+    for module in ["parse", "frontend"]:
+        ms, heavy = importtime(module)
+        print(f"import {module}: {ms:.1f}ms")
+        if heavy:
+            print(f"  eagerly imports {', '.join(heavy)}")
+            ok = False
+
+    with tempfile.TemporaryDirectory() as cache:
+        env = dict(os.environ, XDG_CACHE_HOME=cache)
+        print(f"first diagnostic, empty grammar cache: {first_diagnostic(file, env):.1f}ms")
+        print(f"first diagnostic, warm grammar cache: {first_diagnostic(file, env):.1f}ms")
+    return ok
+
+
+def nested(globals, functions, depth):
+    lines = [f"var g{i} : int = {i};" for i in range(globals)]
+    for f in range(functions):
+        lines.append(f"func f{f}() {{")
+        for d in range(depth):
+            lines.append(f"var l{d} : int = g{(f * depth + d) % globals} + {d};")
+            lines.append(f"if (l{d} > 0) {{" if d % 2 else f"while (l{d} < 0) {{")
+        lines.append("print(l0);")
+        lines.extend("}" * (depth + 1))
+    return "\n".join(lines)
+
+
+#entering a scope shouldn't depend on how many symbols are declared outside it
+def scopes(globals=10000, functions=200, depth=20):
+    sys.path.insert(0, HERE)
+    from parse import parseProgram, newContext
+    times = {}
+    for g in [10, globals]:
+        program, _ = parseProgram(nested(g, functions, depth))
+        start = time.perf_counter()
+        issues = list(program.validate(newContext()))
+        times[g] = time.perf_counter() - start
+        print(f"{g} globals, {functions} functions {depth} scopes deep: validate {times[g] * 1000:.1f}ms, {len(issues)} issues")
+    return times[globals] <= times[10] * 2
+
+
+#the analyses parse runs share a single walk, they are also run with a walk each to compare
+def passes(file, rounds=5):
+    sys.path.insert(0, HERE)
+    from parse import parseProgram, newContext
+    from language.cfg import CFG
+    from language.elements.passes import PassManager
+    from language.elements.analyses import Validation, ControlFlow
+    with open(file) as f:
+        program, _ = parseProgram(f.read())
+    times, walks = {False: float("inf"), True: float("inf")}, {}
+    for _ in range(rounds):  # alternated, the best of each is kept
+        for fused in [False, True]:
+            analyses = [Validation(newContext()), ControlFlow(CFG(), True)]
+            managers = [PassManager(*analyses)] if fused else [PassManager(a) for a in analyses]
+            start = time.perf_counter()
+            issues = [i for m in managers for i in m.run(program)]
+            times[fused] = min(times[fused], time.perf_counter() - start)
+            walks[fused] = sum(m.walks for m in managers)
+    for fused in [False, True]:
+        print(f"{'fused' if fused else 'a walk per pass'}: {walks[fused]} walks {times[fused] * 1000:.1f}ms, {len(issues)} issues")
+
+    manager = PassManager(Validation(newContext()), ControlFlow(CFG(), True), timed=True)
+    for _ in manager.run(program):
+        pass
+    for name, seconds in manager.times.items():
+        print(f"  {name}: {seconds * 1000:.1f}ms")
+    return times[True] <= times[False]
+
+
+#a CFG shaped like a program with many functions: statements, a loop, an if, a return and dead code after it
+def functionsGraph(nodes):
+    from language.cfg import CFG, NodeKind, EdgeKind
+    G = CFG()
+    while len(G) < nodes:
+        start = G.node(-1, NodeKind.Start, "START")
+        end = G.node(-1, NodeKind.End, "END")
+        prev = start
+        for _ in range(20):
+            n = G.node(-1, NodeKind.Statement, "")
+            G.edge(prev, n)
+            prev = n
+        loop = G.node(-1, NodeKind.Loop, "")
+        body = G.node(-1, NodeKind.Statement, "")
+        branch = G.node(-1, NodeKind.Branch, "")
+        G.edge(prev, loop)
+        G.edge(loop, body, EdgeKind.OnTrue)
+        G.edge(body, branch)
+        G.edge(branch, loop, EdgeKind.OnTrue)
+        G.edge(branch, loop, EdgeKind.OnFalse)
+        ret = G.node(-1, NodeKind.Statement, "")
+        G.edge(loop, ret, EdgeKind.OnFalse)
+        G.edge(ret, end)
+        prev = G.node(-1, NodeKind.Statement, "")  # dead, nothing leads to it
+        for _ in range(5):
+            n = G.node(-1, NodeKind.Statement, "")
+            G.edge(prev, n)
+            prev = n
+        G.edge(prev, end)
+    return G
+
+
+#finding unreachable code should take the same time per node however big the graph is
+def unreachable(nodes=1000000):
+    sys.path.insert(0, HERE)
+    from parse import unreachable
+    perNode = {}
+    for n in [10000, nodes // 10, nodes]:
+        G = functionsGraph(n)
+        start = time.perf_counter()
+        G.csr()
+        adjacency = time.perf_counter() - start
+        start = time.perf_counter()
+        dead = unreachable(G)
+        search = time.perf_counter() - start
+        perNode[n] = (adjacency + search) / len(G)
+        print(f"{len(G)} nodes {len(G.sources)} edges: csr {adjacency * 1000:.1f}ms, search {search * 1000:.1f}ms, {len(dead)} unreachable, {perNode[n] * 1e9:.0f}ns per node")
+    return perNode[nodes] <= perNode[10000] * 2
+
+
+#loops one after the other in a single function, finding which of them loop shouldn't be a search per loop
+def loops(count=4000):
+    sys.path.insert(0, HERE)
+    from parse import parseProgram, graphIssues
+    from language.cfg import CFG, Loops
+    from language.elements.element import Arena
+    perLoop = {}
+    for n in [count // 4, count]:
+        source = "func f(n : int) : int {\nvar i : int = 0;\n" + "".join(f"while (i < {k}) {{ i = i + 1; }}\n" for k in range(n)) + "return i;\n}"
+        with Arena() as arena:
+            program, _ = parseProgram(source)
+            G = CFG()
+            program.append_to_graph(G, True)
+            start = time.perf_counter()
+            structure = Loops(G)
+            issues = list(graphIssues(G, arena, loops=structure))
+            elapsed = time.perf_counter() - start
+        perLoop[n] = elapsed / n
+        print(f"{n} loops, {len(G)} nodes: {elapsed * 1000:.1f}ms, {len(structure.headers)} headers, depth {structure.maxDepth}, {len(issues)} issues")
+    return perLoop[count] <= perLoop[count // 4] * 2
+
+
+#the page only waits for the diagnostics, the graph is drawn in the background and a graph already drawn isn't drawn again
+#after an edit inside one of many functions only that function is laid out again
+def render(file, functions=50):
+    sys.path.insert(0, HERE)
+    from parse import parse
+    from render import Renderer
+    with open(file) as f:
+        data = f.read()
+    start = time.perf_counter()
+    parse(data)
+    inline = time.perf_counter() - start
+    start = time.perf_counter()
+    G = parse(data, draw=False)[5]
+    diagnostics = time.perf_counter() - start
+    renderer = Renderer()
+    start = time.perf_counter()
+    key = renderer.submit(G)
+    renderer.result(key, None)
+    first = time.perf_counter() - start
+    start = time.perf_counter()
+    again = renderer.submit(parse(data, draw=False)[5])
+    renderer.result(again, None)
+    cached = time.perf_counter() - start
+    print(f"diagnostics and svg: {inline * 1000:.1f}ms")
+    print(f"diagnostics only: {diagnostics * 1000:.1f}ms")
+    print(f"svg in the background: {first * 1000:.1f}ms, same graph again: {cached * 1000:.1f}ms")
+
+    source = "".join(f"func f{k}(a : int) : int {{\nwhile (a > {k}) {{ a = a - 1; }}\nreturn a;\n}}\n" for k in range(int(functions)))
+    times = []
+    for text in [source, source.replace("a = a - 1;", "a = a - 2;", 1)]:
+        drawn = renderer.drawn
+        start = time.perf_counter()
+        renderer.result(renderer.submit(parse(text, draw=False)[5]), None)
+        times.append(time.perf_counter() - start)
+        print(f"{int(functions)} functions: {times[-1] * 1000:.1f}ms, {renderer.drawn - drawn} pieces laid out")
+    edited = renderer.drawn - drawn
+
+    #past summaryLimit nodes only the summary is drawn
+    G = parse(source * 10, draw=False)[5]
+    drawn = renderer.drawn
+    start = time.perf_counter()
+    renderer.result(renderer.submit(G), None)
+    print(f"{len(G)} nodes, summary: {(time.perf_counter() - start) * 1000:.1f}ms, {renderer.drawn - drawn} pieces laid out")
+    return key == again and diagnostics <= inline and edited == 1 and renderer.drawn - drawn == 1
+
+
+#a function with many variables all assigned in one loop, and many functions with a loop each one after the other
+#bitvectors and a worklist in reverse postorder keep the time per node about flat for both
+def dataflow(variables=2000, functions=1000):
+    sys.path.insert(0, HERE)
+    from parse import parseProgram, newContext
+    from language.cfg import CFG
+    from language.dataflow import Accesses, reachingDefinitions, liveness
+    from language.elements.element import Arena
+    def manyVariables(n):
+        return ("func f(n : int) : int {\n" + "".join(f"var v{k} : int = n;\n" for k in range(n)) + "while (n > 0) {\n"
+                + "".join(f"v{k} = v{k - 1} + 1;\n" for k in range(1, n)) + "n = n - 1;\n}\n" + f"return v{n - 1};\n}}\nvar r : int = f(3);")
+    def manyFunctions(n):
+        return "".join(f"func f{k}(a : int) : int {{\nvar x : int = a;\nwhile (x < 10) {{ x = x + 1; }}\nreturn x;\n}}\nvar g{k} : int = f{k}(1);\n" for k in range(n))
+    ok = True
+    for shape, make, size in [("variables", manyVariables, variables), ("functions", manyFunctions, functions)]:
+        perNode = {}
+        for n in [size // 4, size]:
+            with Arena() as arena:
+                program, _ = parseProgram(make(n))
+                context = newContext()
+                for _ in program.validate(context):
+                    pass
+                G = CFG()
+                program.append_to_graph(G, True)
+                start = time.perf_counter()
+                accesses = Accesses(G, arena, context.index)
+                found = time.perf_counter() - start
+                start = time.perf_counter()
+                reachingDefinitions(accesses)
+                liveness(accesses)
+                solved = time.perf_counter() - start
+            perNode[n] = (found + solved) / len(G)
+            print(f"{n} {shape}, {len(G)} nodes, {len(accesses.sites)} definitions: accesses {found * 1000:.1f}ms, "
+                  f"reaching definitions and liveness {solved * 1000:.1f}ms, {perNode[n] * 1e6:.1f}us per node")
+        ok = ok and perNode[size] <= perNode[size // 4] * 2
+    return ok
+
+
+if __name__ == '__main__':
+    benchmarks = {"startup": startup, "scopes": scopes, "passes": passes, "unreachable": unreachable, "loops": loops, "render": render, "dataflow": dataflow}
+    if len(sys.argv) < 2 or sys.argv[1] not in benchmarks:
+        print(f"usage: python3 benchmark.py [{'|'.join(benchmarks)}] <file>")
+        sys.exit(2)
+    sys.exit(0 if benchmarks[sys.argv[1]](*map(os.path.abspath, sys.argv[2:])) else 1)
@@ -1,9 +1,10 @@
-from flask import Flask
 import sys
+import threading
 from parse import parse
+from incremental import IncrementalParser
+from render import Renderer
 from collections import Counter,defaultdict
 from language.issue import IssueType
-from bs4 import BeautifulSoup
 
 
 
@@ -43,21 +44,34 @@ def editMessages(messages,index):
     return s
 
 def join_messages(html):
+    from bs4 import BeautifulSoup
     soup = BeautifulSoup(html, 'html.parser')
     
     editMessages(soup,0)
     return str(soup)
 
 
-class Myserver(Flask):
+#flask is only imported when a server is created, the helpers above stay usable without it
+class Myserver():
     def __init__(self,name,input_file):
-        super().__init__(name)
+        from flask import Flask
+        self.app = Flask(name)
         self.input_file = input_file
+        self.incremental = IncrementalParser()
+        self.lock = threading.Lock()  # the dev server is threaded, the incremental parser is changed by every parse
+        self.renderer = Renderer()
+        self.app.route('/')(self.getHTML)
+        self.app.route('/graph/<key>')(self.getGraph)
+        self.app.route('/graph/<key>/<name>')(self.getFunctionGraph)
+
+    def run(self,**kwargs):
+        self.app.run(**kwargs)
         
     def getHTML(self):
         with open(self.input_file) as f:
             data = f.read()
-            linguagem, errors, maxDepth, counters, main_instructions,svg = parse(data)
+        with self.lock:
+            linguagem, errors, maxDepth, counters, main_instructions,G,_ = parse(data,incremental=self.incremental,draw=False)
             c = Counter()
             for i in errors.values():
                 for j in i:
@@ -67,22 +81,36 @@ class Myserver(Flask):
             values['Main instructions'] = main_instructions
             values.update(counters)
             HTML =linguagem.toHTML(errors)
+            #the page doesn't wait for the graph, it asks for it at /graph/<key>
+            graph = "" if G is None else f'<div id="graph" key="{self.renderer.submit(G)}">Drawing the graph...</div>'
             
                     
 
         with open('a.html') as f:
             html = f.read().replace(r"{REPLACE}", join_messages(HTML))
             html = html.replace(r"{REPLACE_2}", countersHTML(values))
-            html = html.replace(r"{REPLACE_SVG}", svg)
+            html = html.replace(r"{REPLACE_SVG}", graph)
             return html
 
+    #202 while the graph is still being drawn
+    def getGraph(self,key):
+        try:
+            svg = self.renderer.result(key)
+        except KeyError:
+            return "",404
+        if svg is None:
+            return "",202
+        return svg,200,{'Content-Type':'image/svg+xml'}
 
+    #the whole graph of one function, the functions of a summary link to it
+    def getFunctionGraph(self,key,name):
+        try:
+            return self.getGraph(self.renderer.submitFunction(key,name))
+        except KeyError:
+            return "",404
 
-app = Myserver(__name__,sys.argv[1])
-    
-@app.route('/')
-def serve_html():
-    return app.getHTML()
 
 if __name__ == '__main__':
-    app.run(debug=True,port=8080,extra_files=[sys.argv[1],'a.html'])
\ No newline at end of file
+    app = Myserver(__name__,sys.argv[1])
+    #the input file isn't watched, restarting would throw away the incremental parser
+    app.run(debug=True,port=8080,extra_files=['a.html'])
\ No newline at end of file
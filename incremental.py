@@ -0,0 +1,238 @@
+import re
+import hashlib
+from bisect import bisect_left
+from typing import Iterator
+from collections import Counter
+from lark.exceptions import LarkError
+from parse import parseProgram
+from language.context import Context, SymbolIndex
+from language.issue import Issue
+from language.elements.control import Program, Function, Declaration
+from language.elements.element import Arena, currentArena
+
+# only what is needed to find where a top level item ends:
+# comments, strings and chars are matched so their contents are skipped
+# identifiers aren't needed, an item that doesn't start with one of these keywords ends at its first top level ';'
+TOKEN = re.compile(r"""//[^\n]*|/\*.*?\*/|"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*'|\b(?:if|elif|else|do|while|func)\b|[{};]""", re.S)
+BYTES_TOKEN = re.compile(TOKEN.pattern.encode(), re.S)
+
+
+#input can also be bytes or a mmap, then the items are never copied into a single string
+#start has to be the start of an item
+def topLevelSpans(input, start=0) -> Iterator[tuple[int,int]]:
+    depth = 0
+    first = None     # first token of the current item
+    closed = None    # where the current if/do item closed its last scope, waiting to see if it continues
+    token_re = TOKEN if isinstance(input, str) else BYTES_TOKEN
+    for m in token_re.finditer(input, start):
+        token = m.group()
+        if not isinstance(token, str):
+            token = token.decode(errors="replace")
+        if token.startswith(("//", "/*")):
+            continue
+        if closed is not None:
+            if (first == "if" and token in ("elif", "else")) or (first == "do" and token == "while"):
+                closed = None
+            else:
+                yield start, closed
+                start = closed
+                closed = None
+                first = None
+        if first is None:
+            first = token
+        if token == "{":
+            depth += 1
+        elif token == "}":
+            depth -= 1
+            if depth == 0:
+                if first in ("if", "do"):
+                    closed = m.end()
+                elif first in ("while", "func"):
+                    yield start, m.end()
+                    start = m.end()
+                    first = None
+        elif token == ";" and depth == 0:
+            yield start, m.end()
+            start = m.end()
+            first = None
+    if closed is not None:
+        yield start, closed
+        start = closed
+    yield start, len(input)
+
+
+def splitTopLevel(input: str) -> list[str]:
+    items = (input[start:end] for start,end in topLevelSpans(input))
+    return [i for i in items if i.strip()]
+
+
+#length of the common prefix of a and b, compared a block at a time
+def commonPrefix(a: str, b: str, block=4096) -> int:
+    n = min(len(a), len(b))
+    i = 0
+    while i + block <= n and a[i:i+block] == b[i:i+block]:
+        i += block
+    lo, hi = i, min(i + block, n)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[i:mid] == b[i:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+#a top level item with its elements and what was found when it was last validated
+class Item():
+    def __init__(self, instructions, counter, arena) -> None:
+        self.instructions = instructions
+        self.counter = counter
+        self.arena = arena
+        self.issues = None    # None until validated
+        self.reads = None     # (symbol, is function) of the global symbols it looked up
+        self.found = None     # signatures of the declarations it found for them
+        self.declares = None  # ((symbol, is function), instruction, signature) of what it declared in the global context
+        self.uses = None      # its symbol uses, see SymbolIndex.log
+
+
+#what other items see of a global declaration, a function body or an unused initializer can change without it changing
+def signature(declaration):
+    if declaration is None:
+        return None
+    if isinstance(declaration, Function):
+        return (declaration.name, tuple((a.name, a.type) for a in declaration.args), declaration.returnType)
+    return (declaration.variable, declaration.const, declaration.valueType, declaration.value)
+
+
+#keeps the transformed elements of every top level item from the previous parse
+#only items whose text changed go through lark and T again
+#items are only validated again when they changed or a global symbol they read has a different signature
+class IncrementalParser():
+    def __init__(self, parser="lalr"):
+        self.parser = parser
+        self.items = {}
+        self.order = None     # items of the last parse, None if it fell back to a whole parse
+        self.input = None     # text of the last parse
+        self.spans = []       # (start, end, digest) of its items, digest is None for blank ones
+        self.elements = {}    # id -> element of every item in self.items
+        self.counter = Counter()
+
+    #each item keeps the arena of its elements, it is released when the item stops being used
+    def parseItem(self, text):
+        with Arena() as arena:
+            program, counter = parseProgram(text, self.parser)
+        counter['instructions'] -= 1  # the program wrapping the item
+        return Item(program.instructions, counter, arena)
+
+    def spansFrom(self, input, start) -> Iterator[tuple[int,int,bytes]]:
+        for s, e in topLevelSpans(input, start):
+            text = input[s:e]
+            yield s, e, hashlib.sha256(text.encode()).digest() if text.strip() else None
+
+    #only the part of input around what changed since the last parse is split again
+    #the items before it are kept, the items after it are the old ones shifted once a boundary lines up with an old one
+    def split(self, input) -> list[tuple[int,int,bytes]]:
+        if self.input is None:
+            return list(self.spansFrom(input, 0))
+        old = self.input
+        p = commonPrefix(old, input)
+        q = min(commonPrefix(old[::-1], input[::-1]), len(old) - p, len(input) - p)
+        delta = len(input) - len(old)
+        # an edit can turn an earlier '/*' into a comment, or an earlier quote on the same line into a string
+        line = input.rfind("\n", 0, p) + 1
+        opened = input.rfind("/*", 0, line)
+        if opened != -1 and input.find("*/", opened + 2, line) == -1:
+            return list(self.spansFrom(input, 0))
+        ends = [e for _, e, _ in self.spans]
+        # the end of the last item before the edit may depend on the token after it
+        spans = self.spans[:max(bisect_left(ends, line) - 1, 0)]
+        for s, e, digest in self.spansFrom(input, spans[-1][1] if spans else 0):
+            spans.append((s, e, digest))
+            if len(input) - q <= e < len(input):
+                i = bisect_left(ends, e - delta)
+                if i < len(ends) and ends[i] == e - delta:
+                    spans.extend((s + delta, e + delta, digest) for s, e, digest in self.spans[i+1:])
+                    break
+        return spans
+
+    def parse(self, input):
+        spans = self.split(input)
+        items = {}
+        try:
+            for start, end, digest in spans:
+                if digest is None:
+                    continue
+                key = (digest, 0)
+                while key in items:  # repeated items can't share elements, every element needs its own id
+                    key = (digest, key[1] + 1)
+                items[key] = self.items.get(key) or self.parseItem(input[start:end])
+        except LarkError:
+            items = None
+
+        if items is None:
+            # the split is only a guess, parse everything again to get the real error
+            self.__init__(self.parser)
+            return parseProgram(input, self.parser)
+
+        for key in self.items.keys() - items.keys():
+            self.counter.subtract(self.items[key].counter)
+            for id in self.items[key].arena.elems:
+                del self.elements[id]
+        for key in items.keys() - self.items.keys():
+            self.counter.update(items[key].counter)
+            self.elements.update(items[key].arena.elems)
+        self.items = items
+        self.order = list(items.values())
+        self.input = input
+        self.spans = spans
+
+        analysis = currentArena.get()
+        if analysis is not None:
+            analysis.include(self.elements)
+        counter = +self.counter
+        counter['instructions'] += 1
+        return Program([i for item in self.order for i in item.instructions]), counter
+
+    #validates the program returned by the last parse
+    #the budget isn't checked here, it closes this generator once it is spent, so the item with the issue that spent it
+    #is validated whole and the items after it are left for the next parse
+    def validate(self, program, context: Context) -> Iterator[Issue]:
+        if self.order is None:
+            yield from program.validate(context)
+            return
+        # (symbol, is function) -> signature of what is declared there now, symbol keys change with every context
+        visible = {context.name(k): signature(d) for k, d in context.variables.items()}
+        visible.update((context.name(~k), signature(d)) for k, d in context.functions.items())
+        declared = (len(context.variables), len(context.functions))
+        for item in self.order:
+            if item.issues is None or tuple(map(visible.get, item.reads)) != item.found:
+                self.validateItem(item, context)
+            else:
+                context.index.replay(item.uses, context)
+                for (_, function), instruction, _ in item.declares:
+                    if function:
+                        context.declare_function(instruction)
+                    else:
+                        context.declare_variable(instruction)
+            for name, _, s in item.declares:
+                visible[name] = s
+            yield from item.issues
+        yield from Program.unusedIssues(context, declared)
+
+    def validateItem(self, item, context: Context) -> None:
+        context.reads = {}
+        context.index.log = []
+        try:
+            item.issues = [i for instruction in item.instructions for i in instruction.validate(context)]
+            item.reads = tuple(map(context.name, context.reads))
+            item.found = tuple(signature(d) for d in context.reads.values())
+            item.uses = SymbolIndex.split(context.index.log)
+        finally:
+            context.reads = None
+            context.index.log = None
+        item.declares = []
+        for i in item.instructions:
+            if isinstance(i, Function):
+                item.declares.append(((i.name, True), i, signature(i)))
+            elif isinstance(i, Declaration) and context.get_variable_declaration(i.variable) is i:
+                item.declares.append(((i.variable, False), i, signature(i)))
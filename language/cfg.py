@@ -0,0 +1,428 @@
+from __future__ import annotations
+import hashlib
+from array import array
+from enum import IntEnum
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    import pygraphviz as pgv
+
+
+class NodeKind(IntEnum):
+    Start = 0
+    End = 1
+    Statement = 2
+    Branch = 3    # the condition of an if
+    Loop = 4      # the condition of a while or do while
+    Function = 5  # a function, its body starts after it
+    Cluster = 6   # a whole cluster drawn on its own, see CFG.split
+
+class EdgeKind(IntEnum):
+    Fallthrough = 0
+    OnTrue = 1
+    OnFalse = 2
+
+EDGE_LABELS = ("", "True", "False")
+
+
+#control flow graph with integer nodes numbered in the order they are added
+#nodes and edges are kept in flat arrays, the adjacency is built as CSR (compressed sparse row) the first time it is needed
+#each node belongs to a cluster, 0 is the whole graph and every function body is a cluster inside the one it is in
+#graphviz is only used to draw it, see toAGraph
+class CFG():
+    def __init__(self) -> None:
+        self.elems = array('l')     # id of the element of each node, -1 for the START and END of a stream
+        self.kinds = array('b')
+        self.labels = []            # text of each node, only used to draw it
+        self.nodeClusters = array('l')
+        self.sources = array('l')
+        self.targets = array('l')
+        self.edgeKinds = array('b')
+        self.edgeClusters = array('l')
+        self.clusters = [(None, -1)]  # (name, parent) of each cluster
+        self.calls = []               # (cluster, name of the function) of each call, for the summary
+        self.links = {}               # function a node links to in the drawing
+        self.adjacency = None
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def node(self, elem: int, kind: NodeKind, label: str, cluster=0) -> int:
+        self.elems.append(elem)
+        self.kinds.append(kind)
+        self.labels.append(label)
+        self.nodeClusters.append(cluster)
+        return len(self.kinds) - 1
+
+    def edge(self, source: int, target: int, kind=EdgeKind.Fallthrough, cluster=0) -> None:
+        self.sources.append(source)
+        self.targets.append(target)
+        self.edgeKinds.append(kind)
+        self.edgeClusters.append(cluster)
+        self.adjacency = None
+
+    def cluster(self, name: str, parent=0) -> int:
+        self.clusters.append((name, parent))
+        return len(self.clusters) - 1
+
+    def call(self, cluster: int, name: str) -> None:
+        self.calls.append((cluster, name))
+
+    #(offsets, successors, edge kinds, offsets, predecessors), the successors of n are successors[offsets[n]:offsets[n+1]]
+    def csr(self) -> tuple:
+        if self.adjacency is None:
+            out = self.sort(self.sources, self.targets, self.edgeKinds)
+            into = self.sort(self.targets, self.sources)
+            self.adjacency = (*out, *into[:2])
+        return self.adjacency
+
+    #counting sort of the edges by the node they start from
+    def sort(self, keys: array, values: array, kinds: array = None) -> tuple:
+        n = len(self.kinds)
+        offsets = array('l', [0]) * (n + 1)
+        for k in keys:
+            offsets[k + 1] += 1
+        for i in range(n):
+            offsets[i + 1] += offsets[i]
+        position = offsets[:-1]
+        ordered = array('l', [0]) * len(keys)
+        orderedKinds = array('b', [0]) * len(keys)
+        for e, k in enumerate(keys):
+            p = position[k]
+            ordered[p] = values[e]
+            if kinds is not None:
+                orderedKinds[p] = kinds[e]
+            position[k] = p + 1
+        return offsets, ordered, orderedKinds
+
+    def successors(self, n: int) -> array:
+        offsets, successors, *_ = self.csr()
+        return successors[offsets[n]:offsets[n + 1]]
+
+    def predecessors(self, n: int) -> array:
+        *_, offsets, predecessors = self.csr()
+        return predecessors[offsets[n]:offsets[n + 1]]
+
+    #hash of everything the drawing depends on, graphs with the same digest are drawn the same
+    def digest(self) -> str:
+        h = hashlib.sha256()
+        for a in (self.kinds, self.nodeClusters, self.sources, self.targets, self.edgeKinds, self.edgeClusters):
+            h.update(len(a).to_bytes(8, "little"))
+            h.update(a)
+        h.update(repr((self.labels, self.clusters, sorted(self.links.items()))).encode())
+        return h.hexdigest()
+
+    #the graph of each cluster on its own, in the order of the clusters, the nodes of a piece are renumbered from 0
+    #inside a piece each cluster in it is a single node, an edge between two clusters is in the piece of the innermost
+    #cluster holding both and goes from or to the nodes standing for them, so a piece doesn't change when only the
+    #inside of a cluster in it does
+    def split(self) -> list[CFG]:
+        pieces = [CFG()]
+        proxy = [-1]  # node standing for each cluster in the piece of its parent
+        for name, parent in self.clusters[1:]:
+            piece = CFG()
+            piece.cluster(name)  # everything in the piece is inside the box of its cluster
+            pieces.append(piece)
+            proxy.append(pieces[parent].node(-1, NodeKind.Cluster, name, 0 if parent == 0 else 1))
+            pieces[parent].links[proxy[-1]] = name
+        depth = [0]
+        for name, parent in self.clusters[1:]:
+            depth.append(depth[parent] + 1)
+        local = array('l', [0]) * len(self.kinds)
+        for n in range(len(self.kinds)):
+            c = self.nodeClusters[n]
+            local[n] = pieces[c].node(self.elems[n], self.kinds[n], self.labels[n], 0 if c == 0 else 1)
+
+        #the node n is in the piece of cluster c, its own or the one of the cluster inside c it is in
+        def represent(n, c):
+            inner = self.nodeClusters[n]
+            if inner == c:
+                return local[n]
+            while self.clusters[inner][1] != c:
+                inner = self.clusters[inner][1]
+            return proxy[inner]
+
+        for e in range(len(self.sources)):
+            s, t = self.sources[e], self.targets[e]
+            a, b = self.nodeClusters[s], self.nodeClusters[t]
+            while a != b:
+                if depth[a] >= depth[b]:
+                    a = self.clusters[a][1]
+                else:
+                    b = self.clusters[b][1]
+            pieces[a].edge(represent(s, a), represent(t, a), self.edgeKinds[e], 0 if a == 0 else 1)
+        return pieces
+
+    #a node for each function with how many nodes and loops it has and an edge to each function it calls,
+    #calls from the top level start at START
+    def summary(self) -> CFG:
+        nodes = [0] * len(self.clusters)
+        loops = [0] * len(self.clusters)
+        for c, kind in zip(self.nodeClusters, self.kinds):
+            nodes[c] += 1
+            if kind == NodeKind.Loop:
+                loops[c] += 1
+        S = CFG()
+        # \\n is a line break for graphviz
+        ids = [S.node(-1, NodeKind.Start, f"START\\n{nodes[0]} nodes, {loops[0]} loops")]
+        functions = {}
+        for c, (name, parent) in enumerate(self.clusters[1:], 1):
+            ids.append(S.node(-1, NodeKind.Cluster, f"{name}\\n{nodes[c]} nodes, {loops[c]} loops"))
+            S.links[ids[c]] = name
+            functions.setdefault(name, c)
+        seen = set()
+        for c, name in self.calls:
+            if name in functions and (c, name) not in seen:
+                seen.add((c, name))
+                S.edge(ids[c], ids[functions[name]])
+        return S
+
+    #the same graph for graphviz, clusters, nodes and edges are added in the order they were added here
+    #nodes are named by their number rather than their element, so the drawing only depends on what digest hashes
+    def toAGraph(self) -> pgv.AGraph:
+        import pygraphviz as pgv
+        G = pgv.AGraph(directed=True)
+        graphs = [G]
+        for name, parent in self.clusters[1:]:
+            c = graphs[parent].add_subgraph(name="cluster_"+name)
+            c.graph_attr.update(style='dotted', color='blue', penwidth='2', label=name)
+            graphs.append(c)
+        for n in range(len(self.kinds)):
+            if self.kinds[n] == NodeKind.Cluster:
+                graphs[self.nodeClusters[n]].add_node(str(n), label=self.labels[n], shape="box", style="dotted", color="blue", penwidth="2",
+                                                      **({"URL": "#" + self.links[n]} if n in self.links else {}))
+                continue
+            shape = "Mdiamond" if self.kinds[n] == NodeKind.Branch or self.kinds[n] == NodeKind.Loop else "oval"
+            graphs[self.nodeClusters[n]].add_node(str(n), label=self.labels[n], shape=shape)
+        for e in range(len(self.sources)):
+            graphs[self.edgeClusters[e]].add_edge(str(self.sources[e]), str(self.targets[e]), label=EDGE_LABELS[self.edgeKinds[e]])
+        return G
+
+
+#loop structure of a CFG, everything is computed once for all its loops
+#component has the strongly connected component of each node, cyclic whether the node is on a cycle
+#idom has the immediate dominator of each node reached from a START, -1 for the rest and len(G) for the entries
+#a header is a node with an edge back to it from a node it dominates, header[n] is the innermost loop n is in and
+#depth[n] how many loops it is in, -1 and 0 outside of loops
+class Loops():
+    def __init__(self, G: CFG) -> None:
+        self.G = G
+        offsets, successors, _, inOffsets, predecessors = G.csr()
+        # plain lists are faster to index than arrays
+        self.offsets, self.successors = list(offsets), list(successors)
+        self.inOffsets, self.predecessors = list(inOffsets), list(predecessors)
+        self.components()
+        self.dominators()
+        self.loops()
+
+    #Tarjan's algorithm on an explicit stack, the search starts from the STARTs so the order nodes are finished in
+    #is also the postorder the dominators need, STARTs nothing leads to go first and the body of a function is only
+    #an entry when its declaration isn't reached
+    def components(self) -> None:
+        offsets, successors, inOffsets = self.offsets, self.successors, self.inOffsets
+        n = len(self.G)
+        starts = [v for v in range(n) if self.G.kinds[v] == NodeKind.Start]
+        index = [-1] * n
+        low = [0] * n
+        onStack = bytearray(n)
+        component = [-1] * n
+        cyclic = bytearray(n)
+        stack = []
+        order = []
+        entries = []
+        counter = count = 0
+        for root in [v for v in starts if inOffsets[v] == inOffsets[v + 1]] + starts + list(range(n)):
+            if index[root] != -1:
+                continue
+            entry = len(entries) < len(starts) and self.G.kinds[root] == NodeKind.Start
+            if entry:
+                entries.append(root)
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            onStack[root] = 1
+            work = [root]           # the path being searched
+            edges = [offsets[root]] # the next edge of each node on it
+            while work:
+                v = work[-1]
+                i = edges[-1]
+                end = offsets[v + 1]
+                while i < end:
+                    w = successors[i]
+                    i += 1
+                    if index[w] == -1:
+                        edges[-1] = i
+                        index[w] = low[w] = counter
+                        counter += 1
+                        stack.append(w)
+                        onStack[w] = 1
+                        work.append(w)
+                        edges.append(offsets[w])
+                        break
+                    if w == v:
+                        cyclic[v] = 1
+                    elif onStack[w] and index[w] < low[v]:
+                        low[v] = index[w]
+                else:
+                    work.pop()
+                    edges.pop()
+                    if entry:
+                        order.append(v)
+                    if work and low[v] < low[work[-1]]:
+                        low[work[-1]] = low[v]
+                    if low[v] == index[v]:
+                        w = stack.pop()
+                        onStack[w] = 0
+                        component[w] = count
+                        if w != v:
+                            cyclic[w] = 1
+                            while w != v:
+                                w = stack.pop()
+                                onStack[w] = 0
+                                component[w] = count
+                                cyclic[w] = 1
+                        count += 1
+        self.component = component
+        self.cyclic = cyclic
+        self.entries = entries
+        self.order = order
+
+    #the iterative algorithm of Cooper, Harvey and Kennedy over the reverse postorder, all the entries hang from a virtual root
+    def dominators(self) -> None:
+        inOffsets, predecessors = self.inOffsets, self.predecessors
+        n = len(self.G)
+        root = n
+        postorder = [-1] * (n + 1)
+        for i, v in enumerate(self.order):
+            postorder[v] = i
+        postorder[root] = len(self.order)
+        rpo = self.order[::-1]
+
+        idom = [-1] * (n + 1)
+        idom[root] = root
+        for entry in self.entries:
+            idom[entry] = root
+        seen = [0] * (n + 1)  # the step that last walked through each node, see below
+        step = 0
+        changed = True
+        while changed:
+            changed = False
+            for b in rpo:
+                start, end = inOffsets[b], inOffsets[b + 1]
+                if end - start == 1:  # most nodes have a single predecessor
+                    new = predecessors[start]
+                    if idom[new] == -1 or idom[b] == root:
+                        continue
+                else:
+                    if idom[b] == root:
+                        continue
+                    new = -1
+                    step += 1
+                    for i in range(start, end):
+                        p = predecessors[i]
+                        if idom[p] == -1:
+                            continue
+                        if new == -1:
+                            new = p
+                            seen[new] = step
+                            continue
+                        # a node seen before already leads up to new, so a join of many branches, like the end of
+                        # a long elif chain, walks each dominator once instead of once per branch
+                        while p != new and seen[p] != step:
+                            if postorder[p] < postorder[new]:
+                                seen[p] = step
+                                p = idom[p]
+                            else:
+                                new = idom[new]
+                                seen[new] = step
+                if idom[b] != new:
+                    idom[b] = new
+                    changed = True
+
+        #dominator tree numbered in preorder, a dominates b when b's number is within a's subtree
+        #the children of each node are next to each other once the nodes are sorted by their dominator
+        tree = sorted(rpo, key=idom.__getitem__)
+        childStart = [0] * (n + 2)
+        for v in tree:
+            childStart[idom[v] + 1] += 1
+        for i in range(n + 1):
+            childStart[i + 1] += childStart[i]
+        first = [0] * (n + 1)
+        last = [-1] * (n + 1)
+        counter = 0
+        work = [root]
+        while work:
+            v = work.pop()
+            if v < 0:
+                last[~v] = counter - 1
+                continue
+            first[v] = counter
+            counter += 1
+            work.append(~v)
+            work.extend(tree[childStart[v]:childStart[v + 1]])
+        self.idom = idom
+        self.rpo = rpo
+        self.first = first
+        self.last = last
+
+    def dominates(self, a: int, b: int) -> bool:
+        return self.first[a] <= self.first[b] <= self.last[a]
+
+    #Tarjan's loop nesting on reducible graphs, headers are handled innermost first and each finished loop
+    #is collapsed into its header with union-find, so a node is only looked at by the loops it is in
+    def loops(self) -> None:
+        inOffsets, predecessors = self.inOffsets, self.predecessors
+        n = len(self.G)
+        idom, first, last, cyclic = self.idom, self.first, self.last, self.cyclic
+        parent = list(range(n))
+        def find(x):
+            root = x
+            while parent[root] != root:
+                root = parent[root]
+            while parent[x] != root:
+                parent[x], x = root, parent[x]
+            return root
+
+        header = [-1] * n
+        seen = [-1] * n
+        headers = []
+        for w in reversed(self.rpo):
+            if not cyclic[w]:  # only nodes on a cycle can be headers
+                continue
+            work = []
+            latch = False
+            for i in range(inOffsets[w], inOffsets[w + 1]):
+                v = predecessors[i]
+                if idom[v] != -1 and first[w] <= first[v] <= last[w]:
+                    latch = True
+                    x = find(v)
+                    if x != w and seen[x] != w:
+                        seen[x] = w
+                        work.append(x)
+            if not latch:
+                continue
+            headers.append(w)
+            while work:
+                x = work.pop()
+                header[x] = w
+                parent[x] = w
+                for i in range(inOffsets[x], inOffsets[x + 1]):
+                    y = predecessors[i]
+                    # an edge from outside the loop into it only happens on irreducible graphs, it is left out
+                    if idom[y] == -1 or not first[w] <= first[y] <= last[w]:
+                        continue
+                    z = find(y)
+                    if z != w and seen[z] != w:
+                        seen[z] = w
+                        work.append(z)
+
+        headers.reverse()  # outer loops first
+        depth = [0] * n
+        for h in headers:
+            depth[h] = 1 + (depth[header[h]] if header[h] != -1 else 0)
+        for v in range(n):
+            if header[v] != -1 and depth[v] == 0:
+                depth[v] = depth[header[v]]
+        self.headers = headers
+        self.header = header
+        self.depth = depth
+        self.maxDepth = max((depth[h] for h in headers), default=0)
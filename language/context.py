@@ -1,23 +1,126 @@
 from __future__ import annotations
-from collections import Counter
+from collections import Counter, defaultdict
+from itertools import islice
+from typing import Iterator, Optional
 
 
-class Stats():
-    def __init__(self):
-        self.maxLoops = 0
+#where each symbol of the file is defined and used, built while validating and shared by every scope
+#declarations made by the validation itself, like the ones of function arguments, point to the element they come from
+class SymbolIndex():
+    def __init__(self) -> None:
+        self.definitions = {}                # declaration id -> id of the element defining it
+        self.references = defaultdict(list)  # definition id -> ids of the elements using it
+        self.usedBy = {}                     # use id -> definition id
+        self.used = set()                    # definition ids with at least one use, kept by clear()
+        self.log = None                      # when set, uses are also recorded as (global symbol or None, is function, definition id, use id)
+        self.pending = []                    # (definition id, use id) lists only added when the index is queried
 
-    def mergeWith(self, stats: Stats, isLoop: bool = False):
-        self.maxLoops = max(self.maxLoops, stats.maxLoops + (1 if isLoop else 0))
+    def define(self, declaration, elem) -> None:
+        self.definitions[declaration.id] = elem.id
 
+    def definition(self, declaration) -> int:
+        return self.definitions.get(declaration.id, declaration.id)
 
+    def use(self, definition: int, use: int) -> None:
+        self.references[definition].append(use)
+        self.usedBy[use] = definition
+        self.used.add(definition)
+
+    def is_used(self, declaration) -> bool:
+        return self.definition(declaration) in self.used
+
+    def find_references(self, id: int) -> list[int]:
+        self.flush()
+        return self.references.get(id, [])
+
+    def find_definition(self, id: int) -> Optional[int]:
+        self.flush()
+        return self.usedBy.get(id)
+
+    def flush(self) -> None:
+        for uses in self.pending:
+            for definition, use in uses:
+                self.references[definition].append(use)
+                self.usedBy[use] = definition
+        self.pending = []
+
+    #uses recorded by log in another validation of the same elements, split by split()
+    #global symbols are looked up again in context, the other uses can't have changed and wait until a query
+    def replay(self, uses, context) -> None:
+        globals, locals = uses
+        for symbol, function, use in globals:
+            self.use(self.definition(context.lookup(symbol, function)), use)
+        self.pending.append(locals)
+
+    @staticmethod
+    def split(log) -> tuple[list, list]:
+        return [(s, f, u) for s, f, _, u in log if s is not None], [(d, u) for s, _, d, u in log if s is None]
+
+    #only keeps which definitions were used
+    def clear(self) -> None:
+        self.references.clear()
+        self.usedBy.clear()
+        self.pending = []
+
+
+#scopes are chained, a new scope starts empty and lookups go up through its parents
+#identifiers are interned to small ints shared by the scopes of one analysis, a new global context starts a new table
 class Context():
     def __init__(self,parent=None,returnType=None):
-        self.variables = {} if parent is None else parent.variables.copy()
-        self.functions = {} if parent is None else parent.functions.copy()
+        self.parent = parent
+        self.root = self if parent is None else parent.root
+        self.index = SymbolIndex() if parent is None else parent.index
+        self.symbolIds = {} if parent is None else parent.symbolIds  # symbol -> id
+        self.symbols = [] if parent is None else parent.symbols        # id -> symbol
+        self.variables = {}  # declarations of this scope only, by symbol id
+        self.functions = {}
+        self.found = {}
+        self.reads = None  # when set, every global lookup is recorded with what it found
+        self.types = {}  # element id -> resolved type, see Expression.type
+        self.kinds = {}
         self.usedVariables = Counter()
         self.usedFunctions = Counter()
         self.returnType = returnType
-        self.stats = Stats()
+
+    def symbolId(self,symbol) -> int:
+        id = self.symbolIds.get(symbol)
+        if id is None:
+            id = self.symbolIds[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return id
+
+    #the symbol of a key and whether it is a function, the same in every analysis unlike the key
+    def name(self,key) -> tuple[str,bool]:
+        return (self.symbols[~key],True) if key < 0 else (self.symbols[key],False)
+
+    #nearest declaration of symbol, None if it isn't declared
+    def lookup(self,symbol,functions=False):
+        id = self.symbolId(symbol)
+        return self.lookupId(~id if functions else id)
+
+    #negative keys are functions
+    #what is found in the parents is remembered, misses too, parents don't change while a child scope is in use
+    #the chain is walked in a loop, scopes can be nested as deep as an elif chain is long
+    def lookupId(self,key):
+        context = self
+        searched = []  # scopes that didn't have key and haven't looked for it in their parents
+        while True:
+            table = context.functions if key < 0 else context.variables
+            declaration = table.get(~key if key < 0 else key)
+            if context.parent is None:
+                if context.reads is not None and key not in context.reads:
+                    context.reads[key] = declaration
+                break
+            if declaration is not None:
+                break
+            if key in context.found:
+                declaration = context.found[key]
+                break
+            searched.append(context)
+            context = context.parent
+        for context in searched:
+            context.found[key] = declaration
+        return declaration
 
     def in_global_scope(self) -> bool:
         return self.parent is None
@@ -28,44 +131,70 @@ class Context():
     def used_variables(self) -> Counter:
         return self.usedVariables
     def used_functions(self) -> Counter:
-        return self.functions
+        return self.usedFunctions
     def used_symbols(self) -> Counter :
-        return self.usedVariables + self.functions
+        return self.usedVariables + self.usedFunctions
     
     def use_variables(self,symbol) -> None:
         self.usedVariables[symbol]+=1
     def use_functions(self,symbol) -> None:
         self.usedFunctions[symbol]+=1
-    def use_symbol(self,symbol) -> None:
-        if symbol in self.variables:
+    #elem is the element using the symbol, it is added to the index
+    def use_symbol(self,symbol,elem=None) -> None:
+        key = self.symbolId(symbol)
+        declaration = self.lookupId(key)
+        if declaration is not None:
             self.usedVariables[symbol]+=1
         else:
+            key = ~key
+            declaration = self.lookupId(key)
             self.usedFunctions[symbol]+=1
+        if elem is not None and declaration is not None:
+            definition = self.index.definition(declaration)
+            self.index.use(definition, elem.id)
+            if self.index.log is not None:
+                table = self.root.functions if key < 0 else self.root.variables
+                isGlobal = table.get(~key if key < 0 else key) is declaration
+                self.index.log.append((symbol if isGlobal else None, key < 0, definition, elem.id))
     
     def is_declared(self,symbol) -> None:
-        return symbol in self.variables or symbol in self.functions
+        return self.is_declared_variable(symbol) or self.is_declared_function(symbol)
     def is_declared_variable(self,symbol) -> None:
-        return symbol in self.variables
+        return self.lookup(symbol) is not None
     def is_declared_function(self,symbol) -> None:
-        return symbol in self.functions
+        return self.lookup(symbol,True) is not None
     
     
     #elem is the whole declaration, not just the value
-    def declare_variable(self,declaration) -> None:
-        self.variables[declaration.variable]=declaration
+    #definition is the element it comes from when the declaration isn't part of the program
+    def declare_variable(self,declaration,definition=None) -> None:
+        self.variables[self.symbolId(declaration.variable)]=declaration
+        if definition is not None:
+            self.index.define(declaration, definition)
     def declare_function(self,elem) -> None:
-        self.functions[elem.name]=elem
+        self.functions[self.symbolId(elem.name)]=elem
         
     def get_variable_declaration(self,symbol):
-        if symbol in self.variables: return self.variables[symbol]
-        else : return None
+        return self.lookup(symbol)
     def get_funtion_declaration(self,symbol):
-        if symbol in self.functions: return self.functions[symbol]
-        else : return None
+        return self.lookup(symbol,True)
     def get_symbol_declaration(self,symbol):
-        if symbol in self.variables: return self.variables[symbol]
-        elif symbol in self.functions: return self.functions[symbol]
-        else : return None
+        declaration = self.lookup(symbol)
+        return declaration if declaration is not None else self.lookup(symbol,True)
     
+    #declarations of this scope, after the first nVariables and nFunctions, that were never used
+    def unused(self,nVariables=0,nFunctions=0) -> Iterator:
+        for declaration in islice(self.variables.values(), nVariables, None):
+            if not self.index.is_used(declaration):
+                yield declaration
+        for declaration in islice(self.functions.values(), nFunctions, None):
+            if not self.index.is_used(declaration):
+                yield declaration
+
+    #resolved types and kinds are only needed while the elements are being validated
+    def clear_resolved(self) -> None:
+        self.types.clear()
+        self.kinds.clear()
+
     def get_returnType(self):
         return self.returnType
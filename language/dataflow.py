@@ -0,0 +1,213 @@
+from __future__ import annotations
+from heapq import heappop, heappush
+from typing import TYPE_CHECKING
+from .cfg import CFG, NodeKind
+from .elements.control import Declaration, Assignment, If
+from .elements.expressions import Variable
+if TYPE_CHECKING:
+    from .context import SymbolIndex
+    from .elements.element import Arena
+
+
+#a bitvector problem over a CFG solved with a worklist, sets are ints with one bit per thing tracked
+#the fact leaving a node is gen | (fact entering & ~kill), forward problems flow along the edges and backward ones
+#against them, the facts meeting at a node are joined by union (may) or by intersection, starting from universe (must)
+#nodes nothing flows into start from boundary
+#inputs and outputs have the facts entering and leaving each node in the direction of the flow, for a backward
+#problem inputs are the facts after the node
+class Dataflow():
+    def __init__(self, G: CFG, gen: list[int], kill: list[int], forward=True, may=True, boundary=0, universe=0) -> None:
+        self.G = G
+        self.gen = gen
+        self.kill = kill
+        self.forward = forward
+        self.may = may
+        self.boundary = boundary
+        self.universe = universe
+        self.inputs = None
+        self.outputs = None
+
+    def solve(self) -> Dataflow:
+        offsets, successors, _, inOffsets, predecessors = self.G.csr()
+        if self.forward:
+            fromOffsets, sources, toOffsets, targets = inOffsets, predecessors, offsets, successors
+        else:
+            fromOffsets, sources, toOffsets, targets = offsets, successors, inOffsets, predecessors
+        gen, kill, may, boundary = self.gen, self.kill, self.may, self.boundary
+        n = len(self.G)
+        top = 0 if may else self.universe
+        inputs = [top] * n
+        outputs = [top] * n
+        # the nodes waiting are taken by their position in the order, so a loop settles before what comes after it
+        order = self.order()
+        if not self.forward:
+            order.reverse()
+        position = [0] * n
+        for i, v in enumerate(order):
+            position[v] = i
+        work = list(range(n))
+        queued = bytearray(b"\1") * n
+        while work:
+            v = order[heappop(work)]
+            queued[v] = 0
+            start, end = fromOffsets[v], fromOffsets[v + 1]
+            if start == end:
+                fact = boundary
+            elif may:
+                fact = 0
+                for i in range(start, end):
+                    fact |= outputs[sources[i]]
+            else:
+                fact = top
+                for i in range(start, end):
+                    fact &= outputs[sources[i]]
+            inputs[v] = fact
+            out = gen[v] | (fact & ~kill[v])
+            if out != outputs[v]:
+                outputs[v] = out
+                for i in range(toOffsets[v], toOffsets[v + 1]):
+                    w = targets[i]
+                    if not queued[w]:
+                        queued[w] = 1
+                        heappush(work, position[w])
+        self.inputs = inputs
+        self.outputs = outputs
+        return self
+
+    #reverse postorder of a search from the nodes nothing leads to and then from the ones still not found
+    #the successors of a node are searched last first, the body of a loop is added to the graph before its exit so
+    #it comes right after the condition instead of after everything that follows the loop
+    def order(self) -> list[int]:
+        offsets, successors, _, inOffsets, _ = self.G.csr()
+        n = len(self.G)
+        found = bytearray(n)
+        postorder = []
+        for root in [v for v in range(n) if inOffsets[v] == inOffsets[v + 1]] + list(range(n)):
+            if found[root]:
+                continue
+            found[root] = 1
+            stack = [(root, offsets[root + 1])]
+            while stack:
+                v, i = stack[-1]
+                if i > offsets[v]:
+                    stack[-1] = (v, i - 1)
+                    w = successors[i - 1]
+                    if not found[w]:
+                        found[w] = 1
+                        stack.append((w, offsets[w + 1]))
+                else:
+                    stack.pop()
+                    postorder.append(v)
+        postorder.reverse()
+        return postorder
+
+
+#the variables each node of a CFG defines and reads, found from the elements of the nodes and the uses in the index
+#only variables whose every use is in a node of G, in the cluster they are declared in, are tracked, the others can be
+#changed by a call or by code outside of G
+#each tracked variable has a bit, by the order it is declared in, and so does each of its definitions
+class Accesses():
+    def __init__(self, G: CFG, arena: Arena, index: SymbolIndex) -> None:
+        self.G = G
+        n = len(G)
+        defined = []      # (node, declaration id, element, whether it gives a value), in the order of the nodes
+        read = []         # (node, declaration id, variable), a node reads before it defines anything
+        modified = set()  # declaration ids of variables with a part written, like a[i] = x
+        seen = {}         # id of each variable element found -> its cluster
+        declared = {}     # declaration id -> (node, element)
+
+        def variables(exp, node):
+            stack = [exp]
+            while stack:
+                e = stack.pop()
+                if type(e) is Variable:
+                    definition = index.find_definition(e.id)
+                    seen[e.id] = G.nodeClusters[node]
+                    if definition is not None:
+                        read.append((node, definition, e))
+                else:
+                    stack.extend(reversed(e.children()))
+
+        for node in range(n):
+            kind = G.kinds[node]
+            if kind == NodeKind.Start or kind == NodeKind.End:
+                continue
+            elem = arena[G.elems[node]]
+            if kind == NodeKind.Function:
+                for arg in elem.args:
+                    defined.append((node, arg.id, arg, True))
+                    declared[arg.id] = (node, arg)
+            elif type(elem) is If:
+                variables(elem.condition, node)
+            elif type(elem) is Declaration:
+                if elem.value is not None:
+                    variables(elem.value, node)
+                defined.append((node, elem.id, elem, elem.value is not None))
+                declared[elem.id] = (node, elem)
+            elif type(elem) is Assignment:
+                variables(elem.value, node)
+                dest = elem.dest
+                if type(dest) is Variable:
+                    definition = index.find_definition(dest.id)
+                    seen[dest.id] = G.nodeClusters[node]
+                    if definition is not None:
+                        defined.append((node, definition, elem, True))
+                else:
+                    variables(dest, node)
+                    while not type(dest) is Variable and dest.children():
+                        dest = dest.children()[0]
+                    if type(dest) is Variable:
+                        modified.add(index.find_definition(dest.id))
+            else:
+                variables(elem, node)
+
+        self.declarations = []  # element declaring each variable, by its bit
+        self.bits = {}          # declaration id -> bit
+        for id, (node, elem) in sorted(declared.items(), key=lambda item: item[1][0]):
+            cluster = G.nodeClusters[node]
+            if all(seen.get(use) == cluster for use in index.find_references(id)):
+                self.bits[id] = len(self.declarations)
+                self.declarations.append(elem)
+
+        bits = self.bits
+        self.sites = []         # (node, bit, element, whether it gives a value) of each definition, by its own bit
+        self.definitions = [0] * len(self.declarations)  # definitions of each variable
+        self.unassigned = 0     # definitions of declarations without a value
+        self.defines = [0] * n  # variables each node defines
+        self.reads = [(node, bits[d], v) for node, d, v in read if d in bits]  # in the order of the nodes
+        self.accessed = [0] * len(self.declarations)  # how many times each variable is declared, defined or read
+        for node, d, elem, assigned in defined:
+            if d not in bits:
+                continue
+            bit = bits[d]
+            site = 1 << len(self.sites)
+            self.sites.append((node, bit, elem, assigned))
+            self.definitions[bit] |= site
+            if not assigned:
+                self.unassigned |= site
+            self.defines[node] |= 1 << bit
+            self.accessed[bit] += 1
+        for _, bit, _ in self.reads:
+            self.accessed[bit] += 1
+        self.modified = 0
+        for d in modified:
+            if d in bits:
+                self.modified |= 1 << bits[d]
+
+
+#the definitions that can reach each node, by their bit in accesses.sites
+def reachingDefinitions(accesses: Accesses) -> Dataflow:
+    gen = [0] * len(accesses.G)
+    kill = [0] * len(accesses.G)
+    for d, (node, bit, _, _) in enumerate(accesses.sites):
+        gen[node] |= 1 << d
+        kill[node] |= accesses.definitions[bit]
+    return Dataflow(accesses.G, gen, kill).solve()
+
+
+#the variables whose value can still be read after each node (inputs) and before it (outputs)
+def liveness(accesses: Accesses) -> Dataflow:
+    gen = [0] * len(accesses.G)
+    for node, bit, _ in accesses.reads:
+        gen[node] |= 1 << bit
+    return Dataflow(accesses.G, gen, accesses.defines, forward=False).solve()
@@ -0,0 +1,342 @@
+from __future__ import annotations
+from collections import deque
+from typing import Iterator
+from .passes import Pass
+from .expressions import Expression, Kind, Value
+from .control import Program, Declaration
+from .types import VOID, BOOL
+from ..context import Context
+from ..issue import Issue, IssueType, TypeError
+from ..cfg import CFG, NodeKind, EdgeKind
+
+
+#the analyses parse runs in a single walk, see passes.py
+
+
+#issues of the program, each statement is checked in the scope it is in
+class Validation(Pass):
+    def __init__(self, context: Context) -> None:
+        self.contexts = [context]
+        self.declared = []  # (variables, functions) declared in the scope of each open program before it
+        self.muted = None   # a return outside of a function, its value isn't validated
+
+    def enterProgram(self, program):
+        context = self.contexts[-1]
+        self.declared.append((len(context.variables), len(context.functions)))
+
+    def exitProgram(self, program):
+        return Program.unusedIssues(self.contexts[-1], self.declared.pop())
+
+    def exitExpression(self, exp):
+        if self.muted is None:
+            return exp.check(self.contexts[-1])
+
+    exitValue = None  # constants are always valid
+
+    def enterDeclaration(self, declaration):
+        if declaration.valueType != None:
+            return declaration.valueType.validate(self.contexts[-1])
+
+    def exitDeclaration(self, declaration) -> Iterator[Issue]:
+        context = self.contexts[-1]
+        if declaration.value == None:
+            if declaration.const:
+                yield Issue(IssueType.Error, declaration, "Constants must be initialized")
+            elif declaration.valueType == None:
+                yield Issue(IssueType.Error, declaration, "Can't infer type of uninitialized variable")
+        elif isinstance(declaration.value.type(context), VOID):
+            yield Issue(IssueType.Error, declaration.value, "Can't assign variable to void return type")
+        else:
+            yield from TypeError.check(declaration.value, declaration.valueType, context)
+
+        if context.is_declared(declaration.variable):
+            yield Issue(IssueType.Error, declaration, "Symbol already declared")
+        else:
+            context.declare_variable(declaration)
+
+    def exitAssignment(self, assignment) -> Iterator[Issue]:
+        context = self.contexts[-1]
+        if assignment.dest.kind(context) not in [Kind.Variable, None]:
+            yield Issue(IssueType.Error, assignment, f"Cannot assign to expression of kind {assignment.dest.kind(context)}")
+        else:
+            yield from TypeError.check(assignment.value, assignment.dest.type(context), context)
+
+    def enterReturn(self, ret):
+        if self.contexts[-1].get_returnType() == None:
+            self.muted = ret
+            return [Issue(IssueType.Error, ret, "Return is only allowed inside functions")]
+
+    def exitReturn(self, ret):
+        if self.muted is ret:
+            self.muted = None
+            return
+        context = self.contexts[-1]
+        if ret.value != None:
+            return TypeError.check(ret.value, context.get_returnType(), context)
+        elif not isinstance(context.get_returnType(), VOID):
+            return [Issue(IssueType.Error, ret, "Expected expression after return")]
+
+    def enterFunctionArg(self, arg) -> Iterator[Issue]:
+        context = self.contexts[-1]
+        yield from arg.type.validate(context)
+        if context.is_declared(arg.name):
+            yield Issue(IssueType.Error, arg, f"Redefinition of symbol '{arg.name}'")
+        else:
+            context.declare_variable(Declaration(False, arg.name, arg.type, None), arg)
+
+    #the arguments and the body are checked in the function's own scope
+    def enterFunction(self, function):
+        context = self.contexts[-1]
+        self.contexts.append(Context(context, function.returnType))
+        if context.is_declared(function.name):
+            return [Issue(IssueType.Error, function, f"Redefinition of symbol '{function.name}'")]
+
+    def exitFunction(self, function):
+        self.contexts.pop()
+        self.contexts[-1].declare_function(function)
+
+    #the scopes below a statement get a new context once its condition is checked
+    def enterScope(self) -> Context:
+        context = self.contexts[-1]
+        self.contexts.append(Context(context, context.get_returnType()))
+        return context
+
+    def afterIf(self, elem, child):
+        if child is elem.condition:
+            return self.ifCondition(elem.condition, self.enterScope())
+        self.contexts.pop()
+        if child is elem.ifScope and elem.elseScope:
+            self.enterScope()
+
+    def ifCondition(self, condition, context: Context) -> Iterator[Issue]:
+        if not BOOL().isAssignableFrom(condition.type(context)):
+            yield Issue(IssueType.Error, condition, "Condition is not Boolean")
+        elif condition.kind(context) == Kind.Constant:
+            yield Issue(IssueType.Info, condition, "Condition is constant")
+
+    def exitIf(self, elem):
+        if elem.ifScope.isIf() and not elem.ifScope.instructions[0].hasElse():
+            return [Issue(IssueType.Info, elem.ifScope, "Condition can be joint with top if")]
+
+    def afterWhile(self, elem, child):
+        if child is elem.condition:
+            return self.whileCondition(elem.condition, self.enterScope())
+        self.contexts.pop()
+
+    def whileCondition(self, condition, context: Context) -> Iterator[Issue]:
+        if not BOOL().isAssignableFrom(condition.type(context)):
+            yield Issue(IssueType.Error, condition, "Condition must be of type bool")
+        elif condition.kind(context) == Kind.Constant and not isinstance(condition, Value):
+            yield Issue(IssueType.Info, condition, "Condition can be simplified")
+
+    def afterDo_while(self, elem, child):
+        if child is elem.condition:
+            return self.doWhileCondition(elem.condition, self.enterScope())
+        self.contexts.pop()
+
+    def doWhileCondition(self, condition, context: Context) -> Iterator[Issue]:
+        condType = condition.type(context)
+        if not BOOL().isAssignableFrom(condType):
+            yield TypeError(condition, BOOL(), condType)
+        elif condition.kind(context) == Kind.Constant and not isinstance(condition, Value):
+            yield Issue(IssueType.Info, condition, "Condition can be simplified")
+
+
+#the text of the expressions and simple statements, the labels of the CFG
+#an expression is written while it is walked, its parts up to each child before the child is entered
+class Labels(Pass):
+    def __init__(self) -> None:
+        self.labels = {}  # element id -> text, until it is popped
+        self.out = None   # text of the outermost expression being written
+        self.root = None
+        self.parts = []   # the parts still to write of each open expression
+
+    def pop(self, elem) -> str:
+        return self.labels.pop(elem.id)
+
+    def enterExpression(self, exp):
+        if self.out is None:
+            self.out = []
+            self.root = exp
+        parts = iter(exp._strParts())
+        self.parts.append(parts)
+        self.write(parts)
+
+    def afterExpression(self, exp, child):
+        self.write(self.parts[-1])
+
+    def exitExpression(self, exp):
+        self.parts.pop()
+        if exp is self.root:
+            self.labels[exp.id] = ''.join(self.out)
+            self.out = None
+
+    #constants and variables have no children, they are written at once
+    def enterValue(self, exp):
+        if self.out is None:
+            self.labels[exp.id] = exp.valueType.printInstance(exp.value)
+        else:
+            self.out.append(exp.valueType.printInstance(exp.value))
+
+    def enterVariable(self, exp):
+        if self.out is None:
+            self.labels[exp.id] = exp.symbol
+        else:
+            self.out.append(exp.symbol)
+
+    exitValue = exitVariable = None
+
+    #writes parts up to the next child
+    def write(self, parts) -> None:
+        for part in parts:
+            if type(part) is str:
+                self.out.append(part)
+            elif hasattr(part, "check"):  # an expression, cheaper than isinstance with ABCMeta
+                return
+            else:
+                self.out.append(str(part))
+
+    def exitDeclaration(self, statement):
+        self.labels[statement.id] = ''.join(self.pop(p) if isinstance(p, Expression) else p for p in statement._strParts())
+
+    exitAssignment = exitDeclaration
+    exitReturn = exitDeclaration
+
+
+#adds the control flow graph of the program to a CFG
+#a statement leaves its first node and the (node, edge kind) pairs that continue after it in results, its parent links them
+#newScope makes the root program a scope with its own START and END nodes, end is where returns go outside of one
+class ControlFlow(Pass):
+    def __init__(self, graph: CFG, newScope=False, end=None, labels: Labels = None) -> None:
+        self.labels = labels or Labels()
+        self.uses = (self.labels,)
+        self.graph = graph
+        self.clusters = [0]
+        self.ends = [end]
+        self.newScope = newScope  # whether the next program has its own START and END
+        self.scopes = []          # [first node, loose ends, END or None] of each open program
+        self.results = []
+        self.root = None
+
+    def begin(self, root) -> None:
+        self.root = root
+
+    #first node and loose ends of the last root
+    def result(self) -> tuple:
+        return self.results[-1]
+
+    def enterProgram(self, program):
+        if self.newScope:
+            self.newScope = False
+            start = self.graph.node(program.id, NodeKind.Start, "START", self.clusters[-1])
+            end = self.graph.node(program.id, NodeKind.End, "END", self.clusters[-1])
+            self.scopes.append([start, [(start, EdgeKind.Fallthrough)], end])
+            self.ends.append(end)
+        else:
+            self.scopes.append([None, [], None])
+            self.ends.append(self.ends[-1])
+
+    def afterProgram(self, program, child):
+        f, l = self.statement(child) if isinstance(child, Expression) else self.results.pop()
+        scope = self.scopes[-1]
+        if scope[0] is None:
+            scope[0] = f
+        else:
+            for p, k in scope[1]:
+                self.graph.edge(p, f, k, self.clusters[-1])
+        scope[1] = l
+
+    def exitProgram(self, program):
+        self.ends.pop()
+        first, prev, end = self.scopes.pop()
+        if end is None:
+            self.results.append((first, prev))
+            return
+        for p, k in prev:
+            self.graph.edge(p, end, k, self.clusters[-1])
+        self.results.append((first, [(end, EdgeKind.Fallthrough)]))
+
+    #declarations, assignments and function calls are a single node
+    def statement(self, elem) -> tuple:
+        n = self.graph.node(elem.id, NodeKind.Statement, self.labels.pop(elem), self.clusters[-1])
+        return n, [(n, EdgeKind.Fallthrough)]
+
+    def exitDeclaration(self, declaration):
+        self.results.append(self.statement(declaration))
+
+    exitAssignment = exitDeclaration
+
+    #every call is recorded for the summary of the graph, see CFG.summary
+    def enterFunction_call(self, call):
+        self.graph.call(self.clusters[-1], call.name)
+
+    #calls inside a program are added by afterProgram
+    def exitFunction_call(self, call):
+        if call is self.root:
+            self.results.append(self.statement(call))
+
+    def exitReturn(self, ret):
+        n = self.graph.node(ret.id, NodeKind.Statement, self.labels.pop(ret), self.clusters[-1])
+        self.graph.edge(n, self.ends[-1], EdgeKind.Fallthrough, self.clusters[-1])
+        self.results.append((n, []))
+
+    #the loose ends of the branches are joined into the longest one, a chain of elifs stays linear
+    def afterIf(self, elem, child):
+        if child is elem.condition:
+            self.results.append(self.graph.node(elem.id, NodeKind.Branch, self.labels.pop(child), self.clusters[-1]))
+        elif child is elem.ifScope:
+            f, fl = self.results.pop()
+            id = self.results.pop()
+            self.graph.edge(id, f, EdgeKind.OnTrue, self.clusters[-1])
+            if not elem.elseScope:
+                fl.append((id, EdgeKind.OnFalse))
+            self.results.append((id, fl))
+        else:
+            f, el = self.results.pop()
+            id, fl = self.results[-1]
+            self.graph.edge(id, f, EdgeKind.OnFalse, self.clusters[-1])
+            if len(fl) >= len(el):
+                fl.extend(el)
+            else:  # the else of an elif holds the loose ends of the rest of the chain
+                el = el if type(el) is deque else deque(el)
+                el.extendleft(reversed(fl))
+                self.results[-1] = (id, el)
+
+    def afterWhile(self, elem, child):
+        if child is elem.condition:
+            self.results.append(self.graph.node(elem.condition.id, NodeKind.Loop, f"while ({self.labels.pop(child)})", self.clusters[-1]))
+            return
+        f, l = self.results.pop()
+        id = self.results.pop()
+        self.graph.edge(id, f, EdgeKind.OnTrue, self.clusters[-1])
+        for i, k in l:
+            self.graph.edge(i, id, k, self.clusters[-1])
+        self.results.append((id, [(id, EdgeKind.OnFalse)]))
+
+    def afterDo_while(self, elem, child):
+        if child is elem.condition:
+            self.results.append(self.graph.node(elem.condition.id, NodeKind.Loop, f"while ({self.labels.pop(child)})", self.clusters[-1]))
+            return
+        f, l = self.results.pop()
+        id = self.results.pop()
+        for p, k in l:
+            self.graph.edge(p, id, k, self.clusters[-1])
+        self.graph.edge(id, f, EdgeKind.OnTrue, self.clusters[-1])
+        self.results.append((f, [(id, EdgeKind.OnFalse)]))
+
+    #the body of a function is a scope in its own cluster
+    def enterFunction(self, function):
+        self.clusters.append(self.graph.cluster(function.name, self.clusters[-1]))
+        label = f"func {function.name}({', '.join(str(x) for x in function.args)}): {function.returnType}"
+        self.results.append(self.graph.node(function.id, NodeKind.Function, label, self.clusters[-1]))
+        self.newScope = True
+
+    def afterFunction(self, function, child):
+        if child is function.body:
+            f, l = self.results.pop()
+            id = self.results.pop()
+            self.graph.edge(id, f, EdgeKind.Fallthrough, self.clusters[-1])
+            self.results.append((id, l))
+
+    def exitFunction(self, function):
+        self.clusters.pop()
@@ -1,43 +1,152 @@
+from __future__ import annotations
 from abc import ABC, abstractmethod
+from contextvars import ContextVar
 from ..context import Context
 from ..issue import Issue,IssueType
-from typing import Iterator
+from .walk import render
+from itertools import chain
+from operator import methodcaller
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional
+if TYPE_CHECKING:
+    from ..cfg import CFG
+
+
+#id -> element lookup for the elements created during one analysis
+#it is released as a whole with the analysis, elements created outside an arena aren't registered
+#ids keep coming from Element.last_id so elements reused by another analysis never collide
+class Arena():
+    def __init__(self) -> None:
+        self.elems = {}
+        self.included = []
+        self.token = None
+
+    def __enter__(self) -> Arena:
+        self.token = currentArena.set(self)
+        return self
+
+    def __exit__(self, *args) -> None:
+        currentArena.reset(self.token)
+
+    def add(self, elem: Element) -> None:
+        self.elems[elem.id] = elem
+
+    #elements dropped while building, like duplicates replaced by a shared one
+    def remove(self, elem: Element) -> None:
+        self.elems.pop(elem.id, None)
+
+    #elements built elsewhere and reused in this analysis, the dict is looked up but not copied
+    def include(self, elems: dict) -> None:
+        self.included.append(elems)
+
+    def __getitem__(self, id: int) -> Element:
+        if id in self.elems:
+            return self.elems[id]
+        for elems in self.included:
+            if id in elems:
+                return elems[id]
+        raise KeyError(id)
+
+    def __len__(self) -> int:
+        return len(self.elems) + sum(len(e) for e in self.included)
+
+currentArena: ContextVar[Optional[Arena]] = ContextVar("currentArena", default=None)
+
 
 class Element(ABC):
+    __slots__ = ("id",)
     last_id = 0
-    elems={}
     
     def __init__(self) -> None:
         Element.last_id += 1
         self.id = Element.last_id
-        self.elems[self.id]=self
+        arena = currentArena.get()
+        if arena is not None:
+            arena.add(self)
+
+    #the walks below keep their own stack, see walk.py and passes.py
 
-    @abstractmethod
     def validate(self, context: Context) -> Iterator[Issue]:
-        pass
+        from .analyses import Validation
+        return Validation(context).run(self)
+
+    #the elements below, in the order the passes walk them
+    def children(self) -> Iterable[Element]:
+        return ()
 
+    #what the element is made of, children included
     @abstractmethod
-    def __eq__(self, obj) -> bool:
+    def structure(self) -> Optional[tuple]:
         pass
+
+    def __eq__(self, obj) -> bool:
+        return self is obj or (type(self) is type(obj) and equal(self, obj))
     
-    @abstractmethod
     def __str__(self) -> str:
+        return render(self, strParts)
+
+    #strings and children, in the order they are written
+    @abstractmethod
+    def _strParts(self) -> Iterable:
         pass
     
     def __repr__(self) -> str:
         return str(self)
     
+    #strings and (child, depth) pairs, in the order they are written
     @abstractmethod
-    def _toHTML(self, errors, depth=0) -> str:
+    def _htmlParts(self, errors, depth=0) -> Iterable:
         pass
     
     def toHTML(self,errors, depth=0) -> str :
-        if self.id in errors:
-            objErrors = errors[self.id]
+        def parts(item):
+            elem = item[0]
+            if len(item) > 2:
+                return elem._htmlParts(errors, *item[1:])
+            opening = Element.errorSpan(elem, errors) if elem.id in errors else None
+            if opening is None:
+                return elem._htmlParts(errors, item[1])
+            return chain((opening,), elem._htmlParts(errors, item[1]), ("</span>",))
+        return render((self, depth), parts)
+
+    #the span marking the most severe issue of elem, None if it has none
+    @staticmethod
+    def errorSpan(elem, errors) -> Optional[str]:
+        if elem.id in errors:
+            objErrors = errors[elem.id]
             
             for typ,clas in [(IssueType.Error,"error"),(IssueType.Warning,"warning"),(IssueType.Info,"sugestion")]:
                 for error in objErrors:
                     if error.valueType == typ:
-                        return f"""<span id="{self.id}" class="{clas}" message="{error.msg}">{self._toHTML(errors,depth)}</span>"""
-        else: return self._toHTML(errors,depth)
-        
+                        return f"""<span id="{elem.id}" class="{clas}" message="{error.msg}">"""
+        return None
+
+    #returns the first node and the (node, edge kind) pairs leaving the element
+    def append_to_graph(self, graph: CFG, NewScope=False, end=None):
+        from .analyses import ControlFlow
+        cfg = ControlFlow(graph, NewScope, end)
+        for _ in cfg.run(self):
+            pass
+        return cfg.result()
+
+
+strParts = methodcaller("_strParts")
+
+
+#compares the structures of a and b pair by pair, expressions with different hashes are different
+def equal(a, b) -> bool:
+    stack = [(a, b)]
+    while stack:
+        x, y = stack.pop()
+        if type(x) is not type(y) or (type(x).__hash__ is not None and hash(x) != hash(y)):
+            return False
+        sx, sy = x.structure(), y.structure()
+        if sx is None or len(sx) != len(sy):
+            return False
+        for u, v in zip(sx, sy):
+            if u is v:
+                continue
+            if hasattr(type(u), "structure"):  # an element, cheaper than isinstance with ABCMeta
+                stack.append((u, v))
+            elif u != v:
+                return False
+    return True
@@ -1,91 +1,138 @@
+from __future__ import annotations
 from abc import ABC, abstractmethod
 from typing import Iterator, Optional
 from enum import Enum
 from .types import Type,BOOL,INT,LIST,ARRAY,TUPLE,CHAR,STRING
 from .element import Element
+from .walk import postorder
 from ..context import Context
 from ..issue import Issue, IssueType, TypeError
-import pygraphviz as pgv
+
+#items with sep between them
+def separated(items, sep):
+    for i, item in enumerate(items):
+        if i:
+            yield sep
+        yield item
+
 
 class Kind(Enum):
     Constant = 0
     Variable = 1
     Literal = 2
 
+#expressions are never changed once built, so they are compared and hashed by their structure
+#the hash is computed once, children hashes are cached in them too
+#an expression only has other expressions below it, every walk over it is a post order over children()
 class Expression(Element):
+    __slots__ = ("structuralHash",)
+    resolvesChildren = True  # whether the type and kind are made from the children's
     def __init__(self) -> None:
         super().__init__()
-    @abstractmethod
+
+    #issues of the expression itself, its children were validated before
+    def check(self, context: Context) -> Iterator[Issue]:
+        return ()
+
+    def __hash__(self) -> int:
+        try:
+            return self.structuralHash
+        except AttributeError:
+            for e in postorder(self, lambda e: [c for c in e.children() if not hasattr(c, "structuralHash")]):
+                e.structuralHash = hash((type(e), *e.structure()))
+            return self.structuralHash
+
+    #type and kind are resolved once per scope, the results are kept in the context
+    #the children's are resolved first so _type and _kind only look one level down
     def kind(self, context: Context) -> Optional[Kind]:
+        kinds = context.kinds
+        if self.id not in kinds:
+            if self.resolvesChildren:
+                self.resolveChildren(kinds, "_kind", context)
+            kinds[self.id] = self._kind(context)
+        return kinds[self.id]
+
+    def type(self, context: Context) -> Optional[Type]:
+        types = context.types
+        if self.id not in types:
+            if self.resolvesChildren:
+                self.resolveChildren(types, "_type", context)
+            types[self.id] = self._type(context)
+        return types[self.id]
+
+    def resolveChildren(self, resolved: dict, method: str, context: Context) -> None:
+        pending = lambda e: [c for c in e.children() if c.id not in resolved] if e.resolvesChildren else ()
+        for child in self.children():
+            if child.id not in resolved:
+                for e in postorder(child, pending):
+                    if e.id not in resolved:
+                        resolved[e.id] = getattr(e, method)(context)
+
+    @abstractmethod
+    def _kind(self, context: Context) -> Optional[Kind]:
         pass
 
     @abstractmethod
-    def type(self, context: Context) -> Optional[Type]:
+    def _type(self, context: Context) -> Optional[Type]:
         pass
 
 
 class Value(Expression):
+    __slots__ = ("value", "valueType")
+    resolvesChildren = False
     def __init__(self,value,valueType:Type):
         super().__init__()
         assert type(valueType) in [INT, BOOL, CHAR, STRING]
         self.value = value
         self.valueType = valueType
 
-    def kind(self, context: Context) -> Optional[Kind]:
+    def _kind(self, context: Context) -> Optional[Kind]:
         return Kind.Constant
     
-    def type(self, context: Context) -> Optional[Type]:
+    def _type(self, context: Context) -> Optional[Type]:
         return self.valueType
 
-    def validate(self, context: Context) -> Iterator[Issue]:
-        return []
-    
-    def __eq__(self, obj) -> bool:
-        return type(self) == type(obj) \
-            and self.valueType == obj.valueType \
-                and self.value == obj.value
+    def structure(self) -> tuple:
+        return (self.valueType, self.value)
                 
     
-    def __str__(self) -> str:
-        return self.valueType.printInstance(self.value)
+    def _strParts(self):
+        return [self.valueType.printInstance(self.value)]
     
-    def _toHTML(self, errors, depth=0) -> str:
-        return self.valueType.toHTMLInstance(self.value)
+    def _htmlParts(self, errors, depth=0):
+        return [self.valueType.toHTMLInstance(self.value)]
     
     
 class MultiValueExpression(Expression):
+    __slots__ = ("values", "stringOpener", "stringCloser")
     def __init__(self, values: list[Expression],stringOpener:str,stringCloser:str) -> None:
         super().__init__()
         self.values = values
         self.stringOpener = stringOpener
         self.stringCloser = stringCloser
     
-    def __str__(self) -> str:
-        return self.stringOpener+', '.join(str(s) for s in self.values) + self.stringCloser
+    def _strParts(self):
+        return [self.stringOpener, *separated(self.values, ', '), self.stringCloser]
     
-    def _toHTML(self, errors, depth=0) -> str:
-        return f"""<span class="encloser">{self.stringOpener}{'<span class="operator">, </span>'.join(s.toHTML(errors) for s in self.values)}{self.stringCloser}</span>"""
+    def _htmlParts(self, errors, depth=0):
+        return [f"""<span class="encloser">{self.stringOpener}""", *separated(((s, 0) for s in self.values), '<span class="operator">, </span>'), f"""{self.stringCloser}</span>"""]
         
     
-    def __eq__(self, obj: object) -> bool:
-        return type(self) == type(obj) \
-            and self.stringOpener == obj.stringOpener \
-            and self.stringCloser == obj.stringCloser \
-            and len(self.values) == len(obj.values) \
-            and all(a==b for a,b in zip(self.values,obj.values))
+    def structure(self) -> tuple:
+        return (self.stringOpener, self.stringCloser, *self.values)
+
+    def children(self) -> tuple:
+        return self.values
             
-    def kind(self, context: Context) -> Optional[Kind]:
+    def _kind(self, context: Context) -> Optional[Kind]:
         if all(t.kind(context) == Kind.Constant for t in self.values):
             return Kind.Constant
         else:
             return Kind.Literal
-        
-    def validate(self, context: Context) -> Iterator[Issue]:
-        for o in self.values:
-            yield from o.validate(context)
 
 
 class UniTypeMultiValueExpression(MultiValueExpression):
+    __slots__ = ()
     def getBiggerType(self,context):
         bigger_type = self.values[0].type(context)
         for v in self.values:
@@ -96,80 +143,80 @@ class UniTypeMultiValueExpression(MultiValueExpression):
                 bigger_type = vType
         return bigger_type
     
-    def validate(self, context: Context) -> Iterator[Issue]:
-        yield from super().validate(context)
+    def check(self, context: Context) -> Iterator[Issue]:
         bigger_type = self.getBiggerType(context)
         for o in self.values:
             yield from TypeError.check(o, bigger_type, context)
 
 class Tuple(MultiValueExpression):
+    __slots__ = ()
     def __init__(self, values: list[Expression]) -> None:
         super().__init__(values, '(' , ')')
 
-    def validate(self, context: Context) -> Iterator[Issue]:
-        yield from super().validate(context)
+    def check(self, context: Context) -> Iterator[Issue]:
         if len(self.values) < 2:
             yield Issue(IssueType.Error,self, "Tuples with less than two elements aren't allowed")
         
 
-    def type(self, context: Context) -> Optional[Type]:
+    def _type(self, context: Context) -> Optional[Type]:
         return TUPLE([t.type(context) for t in self.values])
 
 class Array(UniTypeMultiValueExpression):
+    __slots__ = ()
     def __init__(self, values: list[Expression]) -> None:
         super().__init__(values, '[' , ']')
 
-    def type(self, context: Context) -> Optional[Type]:
+    def _type(self, context: Context) -> Optional[Type]:
         return ARRAY(self.getBiggerType(context))
     
 class NewArray(Expression):
+    __slots__ = ("elemType", "numElems")
     def __init__(self, elemType: Type, numElems: Expression) -> None:
         super().__init__()
         self.elemType = elemType
         self.numElems = numElems
 
-    def kind(self, context: Context) -> Optional[Kind]:
+    def _kind(self, context: Context) -> Optional[Kind]:
         return Kind.Constant if self.numElems.kind(context) == Kind.Constant else Kind.Literal
 
-    def type(self, context: Context) -> Optional[Type]:
+    def _type(self, context: Context) -> Optional[Type]:
         return ARRAY(self.elemType)
 
-    def validate(self, context: Context) -> Iterator[Issue]:
+    def children(self) -> tuple:
+        return (self.numElems,)
+
+    def check(self, context: Context) -> Iterator[Issue]:
         yield from self.elemType.validate(context)
-        yield from self.numElems.validate(context)
         yield from TypeError.check(self.numElems, INT(), context)
 
-    def __eq__(self, obj) -> bool:
-        return type(self) == type(obj) \
-            and self.elemType == obj.elemType \
-            and self.numElems == obj.numElems
+    def structure(self) -> tuple:
+        return (self.elemType, self.numElems)
 
 
-    def __str__(self) -> str:
-        return f"{self.elemType}[{self.numElems}]"
+    def _strParts(self):
+        return [str(self.elemType), "[", self.numElems, "]"]
 
-    def _toHTML(self, errors, depth=0) -> str:
-        s = self.elemType.toHTML(errors)
-        s += """<span class="operator">[</span>"""
-        s += self.numElems.toHTML(errors)
-        s += """<span class="operator">]</span>"""
-        return s
+    def _htmlParts(self, errors, depth=0):
+        return [(self.elemType, 0), """<span class="operator">[</span>""", (self.numElems, 0), """<span class="operator">]</span>"""]
 
 class List(UniTypeMultiValueExpression):
+    __slots__ = ()
     def __init__(self, values: list[Expression]) -> None:
         super().__init__(values, '<' , '>')
 
-    def type(self, context: Context) -> Optional[Type]:
+    def _type(self, context: Context) -> Optional[Type]:
         return LIST(self.getBiggerType(context))
 
 
 class Variable(Expression):
+    __slots__ = ("symbol",)
+    resolvesChildren = False
     
     def __init__(self,symbol) -> None:
         super().__init__()
         self.symbol = symbol
         
-    def kind(self, context: Context) -> Optional[Kind]:
+    def _kind(self, context: Context) -> Optional[Kind]:
         if not context.is_declared_variable(self.symbol):
             return None
         
@@ -179,46 +226,45 @@ class Variable(Expression):
 
         return Kind.Variable
     
-    def __eq__(self, obj: object) -> bool:
-        return type(self)== type(obj) \
-            and self.symbol == obj.symbol
+    def structure(self) -> tuple:
+        return (self.symbol,)
 
-    def validate(self, context: Context) -> Iterator[Issue]:
+    def check(self, context: Context) -> Iterator[Issue]:
         if not context.is_declared(self.symbol):
             yield Issue(IssueType.Error,self, "Undefined Variable")
-        context.use_symbol(self.symbol)
+        context.use_symbol(self.symbol, self)
     
-    def type(self, context: Context) -> Optional[Type]:
+    def _type(self, context: Context) -> Optional[Type]:
         if context.is_declared_variable(self.symbol):
             return context.get_variable_declaration(self.symbol).type(context)
         else:
             return None
         
-    def __str__(self):
-        return self.symbol
+    def _strParts(self):
+        return [self.symbol]
     
-    def _toHTML(self, errors, depth=0) -> str:
-        return f"""<span class="variable">{self.symbol}</span>"""
+    def _htmlParts(self, errors, depth=0):
+        return [f"""<span class="variable">{self.symbol}</span>"""]
     
     
 class Function_call(Expression):
+    __slots__ = ("name", "args")
+    resolvesChildren = False
     def __init__(self,name : str,args : list[Expression]) -> None:
         super().__init__()
         self.name = name
         self.args = args
         
-    def kind(self, context: Context) -> Optional[Kind]:
+    def _kind(self, context: Context) -> Optional[Kind]:
         return Kind.Literal
     
-    def __eq__(self, obj: object) -> bool:
-        return type(self)== type(obj) \
-            and self.name == obj.name \
-            and len(self.args) == len(obj.args) \
-            and all(t==k for t,k in zip(self.args,obj.args))
+    def structure(self) -> tuple:
+        return (self.name, *self.args)
+
+    def children(self) -> tuple:
+        return self.args
     
-    def validate(self, context: Context) -> Iterator[Issue]:
-        for o in self.args:
-            yield from o.validate(context)
+    def check(self, context: Context) -> Iterator[Issue]:
         if not context.is_declared_function(self.name):
             yield Issue(IssueType.Error,self, "Undefined Function")
         else:
@@ -228,29 +274,27 @@ class Function_call(Expression):
                 yield Issue(IssueType.Error,self, f"Wrong Number of arguments,  {len(args)} expected but {len(self.args)} where given")
             else:
                 for arg,expectedType in zip(self.args,elementTypes):
-                    if not expectedType.isAssignableFrom(arg.type(context)):
-                        yield Issue(IssueType.Error,arg, f"Argument has wrong type. {str(expectedType)} expected but got {str(arg.type(context))} instead")
+                    argType = arg.type(context)
+                    if not expectedType.isAssignableFrom(argType):
+                        yield Issue(IssueType.Error,arg, f"Argument has wrong type. {str(expectedType)} expected but got {str(argType)} instead")
             
-        context.use_symbol(self.name)
+        context.use_symbol(self.name, self)
         
-    def __str__(self) -> str :
-        return self.name +'('+' ,'.join(str(t) for t in self.args) +')'
+    def _strParts(self):
+        return [self.name, '(', *separated(self.args, ' ,'), ')']
     
-    def _toHTML(self, errors, depth=0) -> str:
-        args = f"""<span class="encloser">({'<span class="operator">, </span>'.join(t.toHTML(errors) for t in self.args)})</span>"""
-        return f"""<span class="line" index={depth}></span><span class="function">{self.name}{args}</span>"""
+    def _htmlParts(self, errors, depth=0):
+        args = separated(((t, 0) for t in self.args), '<span class="operator">, </span>')
+        return [f"""<span class="line" index={depth}></span><span class="function">{self.name}<span class="encloser">(""", *args, """)</span></span>"""]
         
     
-    def type(self, context: Context) -> Optional[Type]:
+    def _type(self, context: Context) -> Optional[Type]:
         return context.get_funtion_declaration(self.name).returnType
-    
-    def append_to_graph(self, graph: pgv.AGraph,NewScope=False, end=None):
-        graph.add_node(str(self.id), label=str(self), shape="oval")
-        return str(self.id),[(str(self.id),"")]
 
 
 #Assumes all operands are of the same type, or are assignable to the same type
 class Operation(Expression):
+    __slots__ = ("operator", "operands", "allowedTypes")
     def __init__(self, operator: str, operands: list[Expression], allowedTypes: list[type]) -> None:
         super().__init__()
         self.operator = operator
@@ -259,7 +303,7 @@ class Operation(Expression):
         for t in allowedTypes:
             assert issubclass(t, Type)
 
-    def kind(self, context: Context) -> Optional[Kind]:
+    def _kind(self, context: Context) -> Optional[Kind]:
         return Kind.Constant if all(o.kind(context) == Kind.Constant for o in self.operands) else Kind.Literal
 
     def getBiggerType(self,context):
@@ -272,10 +316,7 @@ class Operation(Expression):
                 bigger_type = oType
         return bigger_type
 
-    def validate(self, context: Context) -> Iterator[Issue]:
-        for o in self.operands:
-            yield from o.validate(context)
-
+    def check(self, context: Context) -> Iterator[Issue]:
         allAllowed = True
         for o in self.operands:
             oType = o.type(context)
@@ -284,32 +325,34 @@ class Operation(Expression):
                 allAllowed = False
         
         if allAllowed:
+            bigger_type = self.getBiggerType(context)
             for o in self.operands:
-                yield from TypeError.check(o, self.getBiggerType(context), context)
+                yield from TypeError.check(o, bigger_type, context)
+
+    def structure(self) -> tuple:
+        return (self.operator, *self.operands)
 
-    def __eq__(self, obj: object) -> bool:
-        return type(self) == type(obj) \
-            and self.operator == obj.operator \
-            and all(t==k for t,k in zip(self.operands,obj.operands))
+    def children(self) -> tuple:
+        return self.operands
 
 
 class UnaryOperation(Operation):
+    __slots__ = ()
     def __init__(self, operator: str, operand: Expression, allowedTypes: list[type]) -> None:
         super().__init__(operator, [operand], allowedTypes)
 
     def operand(self):
         return self.operands[0]
     
-    def __str__(self) -> bool:
-        return f"{self.operator}{str(self.operand())}"
+    def _strParts(self):
+        return [self.operator, self.operand()]
     
-    def _toHTML(self, errors, depth=0) -> str:
-        s =  f"""<span class="operator">{self.operator}</span>"""
-        s += self.operand().toHTML(errors)
-        return s
+    def _htmlParts(self, errors, depth=0):
+        return [f"""<span class="operator">{self.operator}</span>""", (self.operand(), 0)]
 
 
 class BinaryOperation(Operation):
+    __slots__ = ()
     def __init__(self, operator: str, lterm: Expression, rterm: Expression, allowedTypes: list[type]) -> None:
         super().__init__(operator, [lterm, rterm], allowedTypes)
 
@@ -319,104 +362,121 @@ class BinaryOperation(Operation):
     def rterm(self):
         return self.operands[1]
 
-    def __str__(self) -> bool:
-        return f"{str(self.lterm())} {self.operator} {str(self.rterm())}"
+    def _strParts(self):
+        return [self.lterm(), f" {self.operator} ", self.rterm()]
     
-    def _toHTML(self, errors, depth=0) -> str:
-        s = self.lterm().toHTML(errors)
-        s +=  f"""<span class="operator">{self.operator}</span>"""
-        s += self.rterm().toHTML(errors)
-        return s
+    def _htmlParts(self, errors, depth=0):
+        return [(self.lterm(), 0), f"""<span class="operator">{self.operator}</span>""", (self.rterm(), 0)]
 
 class BooleanBinaryOperation(BinaryOperation):
-    def type(self, context: Context) -> Optional[Type]:
+    __slots__ = ()
+    def _type(self, context: Context) -> Optional[Type]:
         return BOOL()
 
 class Or(BooleanBinaryOperation):
+    __slots__ = ()
     def __init__(self, lterm: Expression, rterm: Expression) -> None:
         super().__init__('||', lterm, rterm, [BOOL])
 class And(BooleanBinaryOperation):
+    __slots__ = ()
     def __init__(self, lterm: Expression, rterm: Expression) -> None:
         super().__init__('&&', lterm, rterm, [BOOL])
 
 class Equality(BooleanBinaryOperation):
+    __slots__ = ()
     def __init__(self, lterm: Expression, rterm: Expression,) -> None:
         super().__init__('==', lterm, rterm, [INT,STRING,CHAR,BOOL,TUPLE,ARRAY,LIST])
 
 class Inequality(BooleanBinaryOperation):
+    __slots__ = ()
     def __init__(self, lterm: Expression, rterm: Expression,) -> None:
         super().__init__('==', lterm, rterm, [INT,STRING,CHAR,BOOL,TUPLE,ARRAY,LIST])
 
 class Gt(BooleanBinaryOperation):
+    __slots__ = ()
     def __init__(self, lterm: Expression, rterm: Expression) -> None:
         super().__init__('>', lterm, rterm, [CHAR,INT])
 class Gte(BooleanBinaryOperation):
+    __slots__ = ()
     def __init__(self, lterm: Expression, rterm: Expression) -> None:
         super().__init__('>=', lterm, rterm, [CHAR,INT])
 class Lt(BooleanBinaryOperation):
+    __slots__ = ()
     def __init__(self, lterm: Expression, rterm: Expression) -> None:
         super().__init__('<', lterm, rterm, [CHAR,INT])
 class Lte(BooleanBinaryOperation):
+    __slots__ = ()
     def __init__(self, lterm: Expression, rterm: Expression) -> None:
         super().__init__('<=', lterm, rterm, [CHAR,INT])
 
 class NumericBinaryOperation(BinaryOperation):
+    __slots__ = ()
     def __init__(self, operator: str, lterm: Expression, rterm: Expression) -> None:
         super().__init__(operator, lterm, rterm, [INT,CHAR])
         
-    def type(self, context: Context) -> Optional[Type]:
+    def _type(self, context: Context) -> Optional[Type]:
         return self.getBiggerType(context)
 
 class Addition(NumericBinaryOperation):
+    __slots__ = ()
     def __init__(self, lterm: Expression, rterm: Expression) -> None:
         super().__init__('+', lterm, rterm)
 
 class Subtraction(NumericBinaryOperation):
+    __slots__ = ()
     def __init__(self, lterm: Expression, rterm: Expression) -> None:
         super().__init__('-', lterm, rterm)
 
 class Multiplication(NumericBinaryOperation):
+    __slots__ = ()
     def __init__(self, lterm: Expression, rterm: Expression) -> None:
         super().__init__('*', lterm, rterm)
 
 class Division(NumericBinaryOperation):
+    __slots__ = ()
     def __init__(self, lterm: Expression, rterm: Expression) -> None:
         super().__init__('/', lterm, rterm)
 
 class Modulo(NumericBinaryOperation):
+    __slots__ = ()
     def __init__(self, lterm: Expression, rterm: Expression) -> None:
         super().__init__('%', lterm, rterm)
 
 class Expotentiation(NumericBinaryOperation):
+    __slots__ = ()
     def __init__(self, lterm: Expression, rterm: Expression) -> None:
         super().__init__('^', lterm, rterm)
 
 
 class BitwiseNot(UnaryOperation):
+    __slots__ = ()
     def __init__(self, operand: Expression) -> None:
         super().__init__('~', operand,[INT,CHAR])
-    def type(self, context: Context) -> Optional[Type]:
+    def _type(self, context: Context) -> Optional[Type]:
         return self.operand.type(context)
 
 class Not(UnaryOperation):
+    __slots__ = ()
     def __init__(self, operand: Expression) -> None:
         super().__init__('!', operand,[BOOL])
-    def type(self, context: Context) -> Optional[Type]:
+    def _type(self, context: Context) -> Optional[Type]:
         return BOOL()
 
 class Length(BinaryOperation):
+    __slots__ = ()
     def __init__(self, lterm: Expression, rterm: Expression) -> None:
         super().__init__('#', lterm, rterm, [ARRAY])
-    def type(self, context: Context) -> Optional[Type]:
+    def _type(self, context: Context) -> Optional[Type]:
         return INT()
 
 class ArrayIndex(Expression):
+    __slots__ = ("array", "index")
     def __init__(self, array: Expression, index: Expression) -> None:
         super().__init__()
         self.array = array
         self.index = index
 
-    def kind(self, context: Context) -> Optional[Kind]:
+    def _kind(self, context: Context) -> Optional[Kind]:
         if self.array.kind(context) == Kind.Constant and self.index.kind(context) == Kind.Constant:
             return Kind.Constant
 
@@ -425,69 +485,62 @@ class ArrayIndex(Expression):
 
         return Kind.Literal
     
-    def type(self, context: Context) -> Optional[Type]:
+    def _type(self, context: Context) -> Optional[Type]:
         containerType = self.array.type(context)
         if isinstance(containerType, ARRAY):
             return containerType.contained
         else:
             return None
     
-    def validate(self, context: Context) -> Iterator[Issue]:
-        yield from self.array.validate(context)
-        yield from self.index.validate(context)
+    def children(self) -> tuple:
+        return (self.array, self.index)
+
+    def check(self, context: Context) -> Iterator[Issue]:
         yield from TypeError.check(self.array, ARRAY(None), context)
         yield from TypeError.check(self.index, INT(), context)
 
-    def __eq__(self, obj: object) -> bool:
-        return type(self) == type(obj) \
-            and self.array == obj.array \
-            and self.index == obj.index
+    def structure(self) -> tuple:
+        return (self.array, self.index)
 
     
-    def __str__(self) -> str:
-        return f"{self.array}[{self.index}]"
+    def _strParts(self):
+        return [self.array, "[", self.index, "]"]
 
-    def _toHTML(self, errors, depth=0) -> str:
-        s = self.array.toHTML(errors)
-        s += """<span class="operator">[</span>"""
-        s += self.index.toHTML(errors)
-        s += """<span class="operator">]</span>"""
-        return s
+    def _htmlParts(self, errors, depth=0):
+        return [(self.array, 0), """<span class="operator">[</span>""", (self.index, 0), """<span class="operator">]</span>"""]
 
 class TupleIndex(Expression):
+    __slots__ = ("tuple", "index")
     def __init__(self, tuple: Expression, index: int) -> None:
         super().__init__()
         self.tuple = tuple
         self.index = index
 
-    def kind(self, context: Context) -> Optional[Kind]:
+    def _kind(self, context: Context) -> Optional[Kind]:
         return self.tuple.kind(context)
     
-    def type(self, context: Context) -> Optional[Type]:
+    def _type(self, context: Context) -> Optional[Type]:
         containerType = self.tuple.type(context)
         if isinstance(containerType, TUPLE) and self.index < len(containerType.tupled):
             return self.tuple.type(context).tupled[self.index]
         else:
             return None
 
-    def validate(self, context: Context) -> Iterator[Issue]:
-        yield from self.tuple.validate(context)
-        
+    def children(self) -> tuple:
+        return (self.tuple,)
+
+    def check(self, context: Context) -> Iterator[Issue]:
         ttype = self.tuple.type(context)
         if not isinstance(ttype, TUPLE):
             yield TypeError(self.tuple, TUPLE(None), ttype)
         elif self.index >= len(self.tuple.type(context).tupled):
             yield Issue(IssueType.Error, self, "Tuple index is out of bounds")
 
-    def __eq__(self, obj: object) -> bool:
-        return type(self) == type(obj) \
-            and self.tuple == obj.tuple \
-            and self.index == obj.index
+    def structure(self) -> tuple:
+        return (self.tuple, self.index)
     
-    def __str__(self) -> str:
-        return f"{self.tuple}#{self.index}"
+    def _strParts(self):
+        return [self.tuple, f"#{self.index}"]
     
-    def _toHTML(self, errors, depth=0) -> str:
-        s = self.tuple.toHTML(errors)
-        s += f"""<span class="operator">#{self.index}</span>"""
-        return s
\ No newline at end of file
+    def _htmlParts(self, errors, depth=0):
+        return [(self.tuple, 0), f"""<span class="operator">#{self.index}</span>"""]
\ No newline at end of file
@@ -0,0 +1,136 @@
+from __future__ import annotations
+from time import perf_counter
+from typing import Callable, Iterable, Iterator, Optional
+from ..issue import Issue
+
+
+#an analysis of the tree, its callbacks are methods named after the kind of element they handle, like lark's Transformer
+#enter<Kind>(elem) runs before the children of elem are walked, after<Kind>(elem, child) after each child
+#and exit<Kind>(elem) after the last one, a kind also matches its subclasses, exitExpression runs for every expression
+#setting a callback to None leaves the kind and its subclasses without one
+#callbacks return the issues they found or None
+class Pass():
+    uses = ()      # passes whose callbacks run before this one's on every element, they can share a walk
+    requires = ()  # passes that have to finish before this one starts
+
+    def name(self) -> str:
+        return type(self).__name__
+
+    #called with each root before it is walked
+    def begin(self, root) -> None:
+        pass
+
+    def callback(self, event: str, cls) -> Optional[Callable]:
+        for c in cls.__mro__:
+            f = getattr(self, event + c.__name__, False)
+            if f is not False:
+                return f
+        return None
+
+    #walks the roots with only this pass and the ones it depends on
+    def run(self, *roots) -> Iterator[Issue]:
+        return PassManager(self).run(*roots)
+
+
+#runs passes with as few walks over the tree as their dependencies allow
+#every pass goes in the first walk after the ones it requires, all the passes of a walk see each element in one visit
+#with timed, times has the seconds spent in the callbacks of each pass and in each whole walk
+class PassManager():
+    def __init__(self, *passes: Pass, timed=False) -> None:
+        self.passes = []
+        self.timed = timed
+        self.times = {}
+        self.walks = 0
+        for p in passes:
+            self.add(p)
+
+    #adds p and the passes it depends on, returns p
+    def add(self, p: Pass) -> Pass:
+        if p not in self.passes:
+            for d in (*p.uses, *p.requires):
+                self.add(d)
+            self.passes.append(p)
+        return p
+
+    def stages(self) -> list[list[Pass]]:
+        stage = {}
+        for p in self.passes:  # dependencies are always added before the passes depending on them
+            stage[p] = max([stage[d] + 1 for d in p.requires] + [stage[d] for d in p.uses] + [0])
+        stages = [[] for _ in range(max(stage.values(), default=-1) + 1)]
+        for p in self.passes:
+            stages[stage[p]].append(p)
+        return stages
+
+    def run(self, *roots) -> Iterator[Issue]:
+        for passes in self.stages():
+            self.walks += 1
+            start = perf_counter()
+            yield from self.walk(passes, roots)
+            if self.timed:
+                self.times[f"walk {self.walks}"] = perf_counter() - start
+
+    def timer(self, p: Pass, f: Callable) -> Callable:
+        name = p.name()
+        self.times.setdefault(name, 0)
+        def timed(*args):
+            start = perf_counter()
+            found = f(*args)
+            if found:
+                found = list(found)  # issues are only found while they are consumed
+            self.times[name] += perf_counter() - start
+            return found
+        return timed
+
+    #the callbacks of each kind are looked up the first time it is seen
+    def walk(self, passes: list[Pass], roots: Iterable) -> Iterator[Issue]:
+        table = {}
+        def callbacks(cls):
+            found = []
+            for event in ("enter", "after", "exit"):
+                fs = [(p, p.callback(event, cls)) for p in passes]
+                found.append([self.timer(p, f) if self.timed else f for p, f in fs if f is not None])
+            table[cls] = found
+            return found
+
+        for root in roots:
+            for p in passes:
+                p.begin(root)
+            enter, after, exit = table.get(type(root)) or callbacks(type(root))
+            for f in enter:
+                found = f(root)
+                if found:
+                    yield from found
+            stack = [(root, iter(root.children()), after, exit)]
+            while stack:
+                elem, children, after, exit = stack[-1]
+                for child in children:
+                    enter, childAfter, childExit = table.get(type(child)) or callbacks(type(child))
+                    for f in enter:
+                        found = f(child)
+                        if found:
+                            yield from found
+                    grandchildren = child.children()
+                    if grandchildren:
+                        stack.append((child, iter(grandchildren), childAfter, childExit))
+                        break
+                    #leaves are finished right away, without a frame of their own
+                    for f in childExit:
+                        found = f(child)
+                        if found:
+                            yield from found
+                    for f in after:
+                        found = f(elem, child)
+                        if found:
+                            yield from found
+                else:
+                    stack.pop()
+                    for f in exit:
+                        found = f(elem)
+                        if found:
+                            yield from found
+                    if stack:
+                        parent, _, after, _ = stack[-1]
+                        for f in after:
+                            found = f(parent, elem)
+                            if found:
+                                yield from found
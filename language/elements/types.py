@@ -1,16 +1,44 @@
-from abc import ABC, abstractmethod
+from abc import ABC, ABCMeta, abstractmethod
 from enum import Enum
+from weakref import WeakKeyDictionary, WeakValueDictionary
 from .element import Element
 from ..context import Context
 from typing import Iterator, Optional
 from ..issue import Issue
-class Type(Element):
+
+
+#there is only one instance of each structural type, INT() or ARRAY(INT()) always return the same object
+#so types are compared by identity and can be used as dict keys
+#the table only holds types still in use, a type nothing refers to is forgotten and made again when needed
+class Interned(ABCMeta):
+    def __call__(cls, *args):
+        key = (cls, *(tuple(a) if isinstance(a, (list, tuple)) else a for a in args))
+        instance = internedTypes.get(key)
+        if instance is None:
+            instance = internedTypes.setdefault(key, super().__call__(*args))
+        return instance
+
+internedTypes = WeakValueDictionary()
+
+
+class Type(Element, metaclass=Interned):
+    __slots__ = ("__weakref__", "assignable")
+
     def __init__(self) -> None:
         super().__init__()
+        self.assignable = WeakKeyDictionary()  # source -> isAssignableFrom result, doesn't keep the source alive
     
     #Determines whether an instance of a specified type can be assigned to a variable of the current type
-    @abstractmethod
     def isAssignableFrom(self, other) -> bool:
+        if other is None:  # the type of something undeclared, it can't be weakly referenced
+            return self._isAssignableFrom(other)
+        result = self.assignable.get(other)
+        if result is None:
+            result = self.assignable[other] = self._isAssignableFrom(other)
+        return result
+
+    @abstractmethod
+    def _isAssignableFrom(self, other) -> bool:
         pass
 
     @abstractmethod
@@ -21,9 +49,14 @@ class Type(Element):
     def toHTMLInstance(self, value) -> str:
         pass
 
-    @abstractmethod
     def __eq__(self, other: object):
-        pass
+        return self is other
+
+    __hash__ = object.__hash__
+
+    #unpickled types go through the interning too
+    def __reduce__(self):
+        return (type(self), ())
 
     @abstractmethod
     def __str__(self):
@@ -34,23 +67,33 @@ class Type(Element):
     
     def validate(self, context: Context) -> Iterator[Issue]:
         return [] #TODO
+
+    #types are interned, they are equal only to themselves
+    def structure(self) -> None:
+        return None
+
+    def _strParts(self):
+        return [str(self)]
+
+    def _htmlParts(self, errors, depth=0):
+        return [self._toHTML(errors, depth)]
      
 
 class Primitive(Type):
+    __slots__ = ()
     def __init__(self) -> None:
         super().__init__()
-    def __eq__(self, other):
-        return type(self) == type(other)
     
     def _toHTML(self, errors, depth=0) -> str:
         s = f"""<span class="type">{str(self)}</span>"""
         return s
 
 class INT(Primitive):
+    __slots__ = ()
     def __init__(self) -> None:
         super().__init__()
         
-    def isAssignableFrom(self, other: Type) -> bool:
+    def _isAssignableFrom(self, other: Type) -> bool:
         return type(other) in [INT, CHAR, BOOL]
     
     def printInstance(self, value) -> str:
@@ -63,10 +106,11 @@ class INT(Primitive):
         return 'int'
     
 class STRING(Primitive):
+    __slots__ = ()
     def __init__(self) -> None:
         super().__init__()
         
-    def isAssignableFrom(self, other: Type) -> bool:
+    def _isAssignableFrom(self, other: Type) -> bool:
         return type(other) in [STRING]
     
     def printInstance(self, value) -> str:
@@ -79,10 +123,11 @@ class STRING(Primitive):
         return 'string'
 
 class CHAR(Primitive):
+    __slots__ = ()
     def __init__(self) -> None:
         super().__init__()
         
-    def isAssignableFrom(self, other: Type) -> bool:
+    def _isAssignableFrom(self, other: Type) -> bool:
         return type(other) in [CHAR]
     
     def printInstance(self, value) -> str:
@@ -95,10 +140,11 @@ class CHAR(Primitive):
         return 'char'
 
 class BOOL(Primitive):
+    __slots__ = ()
     def __init__(self) -> None:
         super().__init__()
         
-    def isAssignableFrom(self, other: Type) -> bool:
+    def _isAssignableFrom(self, other: Type) -> bool:
         return type(other) in [BOOL]
     
     def printInstance(self, value) -> str:
@@ -111,10 +157,11 @@ class BOOL(Primitive):
         return 'bool'
     
 class ANY(Primitive):
+    __slots__ = ()
     def __init__(self) -> None:
         super().__init__()
         
-    def isAssignableFrom(self, other: Type) -> bool:
+    def _isAssignableFrom(self, other: Type) -> bool:
         return True
     
     def printInstance(self, value) -> str:
@@ -127,12 +174,13 @@ class ANY(Primitive):
         return 'any'
 
 class TUPLE(Type):
+    __slots__ = ("tupled",)
     def __init__(self, tupled: Optional[list[Type]]):
         super().__init__()
         assert tupled == None or len(tupled) >= 2
-        self.tupled = tupled
+        self.tupled = tuple(tupled) if tupled != None else None
 
-    def isAssignableFrom(self, other: Type) -> bool:
+    def _isAssignableFrom(self, other: Type) -> bool:
         return isinstance(other, TUPLE) \
             and (self.tupled == None or (
                 len(self.tupled) == len(other.tupled) \
@@ -145,9 +193,8 @@ class TUPLE(Type):
     def toHTMLInstance(self, value) -> str:
         return f"""<span class="encloser">({'<span class="operator">, </span>'.join(t.toHTMLInstance(v) for t,v in zip(self.tupled, value))})</span>"""
 
-
-    def __eq__(self, other):
-        return type(self) == type(other) and self.tupled == other.tupled
+    def __reduce__(self):
+        return (TUPLE, (self.tupled,))
 
     def __str__(self):
         return f"({', '.join(str(t) for t in self.tupled) if self.tupled != None else ','})"
@@ -157,18 +204,20 @@ class TUPLE(Type):
 
 
 class Container(Type):
+    __slots__ = ("contained",)
     def __init__(self, contained: Optional[Type]) -> None:
         super().__init__()
         self.contained = contained
 
-    def isAssignableFrom(self, other: Type) -> bool:
+    def _isAssignableFrom(self, other: Type) -> bool:
         return type(self) == type(other) \
             and (self.contained == None or self.contained.isAssignableFrom(other.contained))
 
-    def __eq__(self, other):
-        return type(self) == type(other) and self.contained == other.contained
+    def __reduce__(self):
+        return (type(self), (self.contained,))
 
 class ARRAY(Container):
+    __slots__ = ()
     def __str__(self):
         return f"[{self.contained if self.contained != None else '?'}]"
     
@@ -183,6 +232,7 @@ class ARRAY(Container):
         return f"""<span class="encloser">[{self.contained.toHTML(errors)}]"""
 
 class LIST(Container):
+    __slots__ = ()
     def __str__(self):
         return f"<{self.contained if self.contained != None else '?'}>"
     
@@ -198,15 +248,13 @@ class LIST(Container):
 
 
 class VOID(Type):
-    def isAssignableFrom(self, other: Type) -> bool:
+    __slots__ = ()
+    def _isAssignableFrom(self, other: Type) -> bool:
         return False
 
     def __str__(self):
         return "void"
     
-    def __eq__(self, other: object):
-        return type(self) == type(other)
-    
     def _toHTML(self, errors, depth=0) -> str:
         assert False #This type shouldn't appear in html
     
@@ -0,0 +1,34 @@
+from typing import Callable
+
+
+#the walks over the tree keep their own stack instead of recursing, so the depth of the tree isn't limited
+#by the interpreter's, an elif chain or a long a+b+c+... can be thousands of elements deep
+
+
+#joins the strings of root, parts(item) gives strings and other items in order, which are expanded the same way
+def render(root, parts: Callable) -> str:
+    out = []
+    stack = [iter(parts(root))]
+    while stack:
+        for item in stack[-1]:
+            if isinstance(item, str):
+                out.append(item)
+            else:
+                stack.append(iter(parts(item)))
+                break
+        else:
+            stack.pop()
+    return ''.join(out)
+
+
+#root and everything below it, children before their parent and in their order
+#children(node) gives the nodes still to visit below node
+def postorder(root, children: Callable) -> list:
+    order = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        order.append(node)
+        stack.extend(children(node))
+    order.reverse()
+    return order
@@ -0,0 +1,94 @@
+import os
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator
+from language.context import Context, SymbolIndex
+from language.issue import Issue, IssueType
+from language.elements.control import Declaration, Function, Program
+from language.elements.analyses import Validation
+
+
+@functools.cache
+def getPool(processes: int) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(processes)
+
+
+#function bodies only read the global symbols declared before them and write to their own sub-context,
+#so the top level is checked here and the bodies are sent to worker processes
+#elements finds the element of an id, the issues are yielded in the order of a serial run
+def validateParallel(program: Program, context: Context, elements, processes=None) -> Iterator[Issue]:
+    # declarations and function signatures in the order they were declared, starting with the ones already in context
+    globals = list(context.variables.values()) + [Function(f.name, f.args, f.returnType, Program([])) for f in context.functions.values()]
+    declared = (len(context.variables), len(context.functions))
+    issues = []   # issues of each top level instruction, or the index of a function's job
+    jobs = []     # (number of globals the function sees, function)
+    for instruction in program.instructions:
+        if isinstance(instruction, Function):
+            if context.is_declared(instruction.name):
+                issues.append([Issue(IssueType.Error, instruction, f"Redefinition of symbol '{instruction.name}'")])
+            issues.append(len(jobs))
+            jobs.append((len(globals), instruction))
+            globals.append(Function(instruction.name, instruction.args, instruction.returnType, Program([])))
+            context.declare_function(instruction)
+        else:
+            issues.append(list(instruction.validate(context)))
+            if isinstance(instruction, Declaration) and context.get_variable_declaration(instruction.variable) is instruction:
+                globals.append(instruction)
+
+    results = []
+    if jobs:
+        global shared
+        processes = processes or os.cpu_count()
+        size = -(-len(jobs) // (processes * 4))
+        bounds = [(i, min(i + size, len(jobs))) for i in range(0, len(jobs), size)]
+        if "fork" in multiprocessing.get_all_start_methods():
+            # workers forked now already have the elements, only the bounds of each chunk are sent
+            shared = (globals, jobs)
+            try:
+                with ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context("fork")) as pool:
+                    for chunk in pool.map(validateShared, bounds):
+                        results.extend(chunk)
+            finally:
+                shared = None
+        else:
+            for chunk in getPool(processes).map(validateChunk, [(globals[:jobs[end-1][0]], jobs[start:end]) for start, end in bounds]):
+                results.extend(chunk)
+
+    for item in issues:
+        if isinstance(item, int):
+            found, uses = results[item]
+            context.index.replay(SymbolIndex.split(uses), context)
+            for id, valueType, msg in found:
+                yield Issue(valueType, elements[id], msg)
+        else:
+            yield from item
+    yield from Program.unusedIssues(context, declared)
+
+
+shared = None
+
+def validateShared(bounds):
+    globals, jobs = shared
+    start, end = bounds
+    return validateChunk((globals[:jobs[end-1][0]], jobs[start:end]))
+
+
+#runs in a worker, the issues go back as (element id, type, message) with the uses of symbols found in the body
+def validateChunk(args):
+    globals, jobs = args
+    context = Context()
+    declared = 0
+    results = []
+    for visible, function in jobs:
+        for g in globals[declared:visible]:
+            if isinstance(g, Function):
+                context.declare_function(g)
+            else:
+                context.declare_variable(g)
+        declared = visible
+        subcontext = Context(context, function.returnType)
+        context.index.log = []
+        found = [(i.elem.id, i.valueType, i.msg) for i in Validation(subcontext).run(*function.args, function.body)]
+        results.append((found, context.index.log))
+    return results
@@ -1,12 +1,23 @@
-from lark import Lark
+from __future__ import annotations
+from lark import Lark, __version__ as larkVersion
 import sys
+import os
+import hashlib
+import functools
+import threading
 from transformer import T
-from language.context import Context
-from collections import defaultdict
-import pygraphviz as pgv
+from language.context import Context,SymbolIndex
+from collections import Counter,defaultdict
+from typing import Iterator
 from language.issue import IssueType,Issue
-from language.elements.element import Element
-from language.elements.control import Function,Program,FunctionArg
+from language.cfg import CFG,NodeKind,Loops
+from language.dataflow import Accesses,reachingDefinitions,liveness
+from language.elements.element import Arena
+from language.elements.passes import PassManager
+from language.elements.analyses import Validation, ControlFlow
+from language.elements.control import Function,Program,FunctionArg,Declaration
+from language.elements.expressions import Expression,Variable,Function_call
+from language.elements.walk import postorder
 from language.elements.types import VOID,ANY
 
 
@@ -48,7 +59,7 @@ lark_parser = r"""
     new_array: type "[" expression "]"
     list: "<" (_sequence | (expression ",")* expression ":" expression) ">"
 
-    OP0: "\|\|"
+    OP0: "||"
     OP1: "&&"
     OP2: "==" | "!="
     OP3: "<" | "<=" | ">" | ">="
@@ -115,66 +126,349 @@ lark_parser = r"""
     %ignore CPP_COMMENT
 """
 
+# Same language as lark_parser, rewritten so it is LALR(1) with a contextual lexer:
+#  - keywords end on a word boundary, so "integer" or "variable" are identifiers
+#  - the comparison operators are split in LT/LTE/GT/GTE and lists/list types use the same
+#    "<" and ">" terminals; the parser state decides if "<" opens a list or compares
+#  - list elements can't have a comparison outside parentheses (<a > b> is ambiguous), every
+#    other operator is still allowed
+#  - both list forms share the same "(expression ",")*" prefix
+lalr_parser = r"""
+    PRIMITIVE.2: /(int|string|char|bool)\b/
+    BOOL.2: /(true|false)\b/
+    KIND.2: /(var|const)\b/
+    INT: /-?\d+/
+    CHAR: /'([^\b\t\n\r']|\\[\\0btnr'])'/
+    STRING: /"([^\b\t\n\r"]|\\[\\0btnr"])*"/
+    IDENTIFIER: /[A-Za-z_]\w*/
+
+    tuple_type: "(" (type ",")+ type? ")"
+    array_type: "[" type "]"
+    list_type: "<" type ">"
+    type: PRIMITIVE | tuple_type | array_type | list_type
+
+    _sequence: (expression ",")* expression?
+
+    constant: INT | CHAR | STRING | BOOL
+    tuple: "(" (expression ",")+ expression? ")"
+    array: "[" _sequence "]"
+    new_array: type "[" expression "]"
+    list: "<" (list_exp0 ",")* (list_exp0 | list_exp0 ":" list_exp0)? ">"
 
-def isItsOwnSuccessor(g:pgv.AGraph,n):
-    nexts = list(g.successors(n))
-    visited=set()
-    while nexts:
-        succ = nexts.pop()
-        if succ in visited:
+    OP0: "||"
+    OP1: "&&"
+    OP2: "==" | "!="
+    LT: "<"
+    LTE: "<="
+    GT: ">"
+    GTE: ">="
+    OP4: "+" | "-"
+    OP5: "*" | "/" | "%"
+    OP6: "^"
+    OP7: "~" | "!" | "#"
+    OP8: /#\d+/
+
+    _exp0: _exp1 | op_or
+    op_or: _exp0 OP0 _exp1
+    _exp1: _exp2 | op_and
+    op_and: _exp1 OP1 _exp2
+    _exp2: _exp3 | op_equality
+    op_equality: _exp2 OP2 _exp3
+    _exp3: _exp4 | op_comparison
+    op_comparison: _exp3 (LT | LTE | GT | GTE) _exp4
+    _exp4: _exp5 | op_sum
+    op_sum: _exp4 OP4 _exp5
+    _exp5: _exp6 | op_multiplication
+    op_multiplication: _exp5 OP5 _exp6
+    _exp6: _exp7 | op_exponentiation
+    op_exponentiation: _exp7 OP6 _exp6
+    _exp7: _exp8 | op_manipulation
+    op_manipulation:  OP7 _exp7
+    _exp8: _exp9 | op_element
+    op_element: _exp8 OP8
+    _exp9: _exp_base | op_indexation
+    op_indexation: _exp9 "[" expression "]"
+
+    ?list_exp0: list_exp1 | list_exp0 OP0 list_exp1 -> op_or
+    ?list_exp1: list_exp2 | list_exp1 OP1 list_exp2 -> op_and
+    ?list_exp2: _exp4 | list_exp2 OP2 _exp4 -> op_equality
+
+    variable : IDENTIFIER
+    _exp_base: constant
+        | variable
+        | tuple
+        | array
+        | new_array
+        | list
+        | function_call
+        | "(" expression ")"
+    expression: _exp0
+
+    declaration: KIND IDENTIFIER ":" type
+    assignment: expression "=" expression
+    decl_ass: KIND IDENTIFIER (":" type)? "=" expression
+
+    scope: "{" program "}"
+    condition: "(" expression ")"
+
+    if_cond: "if" condition scope ("elif" condition scope)* ("else" scope)?
+    while_cond: "while" condition scope
+    do_while: "do" scope "while" condition ";"
+
+    function: "func" IDENTIFIER "(" params ")" (":" type)? scope
+    params: ((IDENTIFIER ":" type ",")* IDENTIFIER ":" type)?
+    function_call: IDENTIFIER "(" _sequence ")"
+    func_return: "return" expression?
+
+    program: (declaration ";" | assignment ";" | decl_ass ";" | function_call ";" | func_return ";" | if_cond | while_cond | do_while | function)*
+
+    %import common (WS, C_COMMENT, CPP_COMMENT)
+    %ignore WS
+    %ignore C_COMMENT
+    %ignore CPP_COMMENT
+"""
+
+grammars = {
+    "lalr": lalr_parser,
+    "earley": lark_parser,
+}
+
+
+CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME",os.path.expanduser("~/.cache")),"eg-tp")
+
+#the lark version is part of the name because the cached tables are pickled lark objects
+#lark also checks a hash of the grammar and options stored inside the file before using it
+def cachePath(grammar) -> str|bool:
+    digest = hashlib.sha256(grammar.encode()).hexdigest()[:16]
+    try:
+        os.makedirs(CACHE_DIR,exist_ok=True)
+    except OSError:
+        return False
+    return os.path.join(CACHE_DIR,f"lalr-{digest}-lark{larkVersion}.cache")
+
+#with a transformer the lalr parser builds its result while parsing, without a parse tree
+#the parse tables are loaded from the on-disk cache, so only the first run builds them
+#parsers are built once per process, don't pass a new transformer on every call
+@functools.cache
+def getParser(parser="lalr",transformer=None) -> Lark:
+    if parser == "lalr":
+        return Lark(lalr_parser,start="program",parser="lalr",lexer="contextual",transformer=transformer,cache=cachePath(lalr_parser))
+    elif parser == "earley":
+        return Lark(lark_parser,start="program")
+    raise ValueError(f"Unknown parser '{parser}', expected one of {list(grammars)}")
+
+#the lark callbacks are bound to this transformer, its counter is replaced on every parse
+inlineTransformer = T()
+inlineLock = threading.Lock()
+
+
+#statements no START reaches, in the order they were added, the program and every function body have a START
+#a single search from all of them, the graph isn't changed
+def unreachable(G:CFG) -> list[int]:
+    offsets, successors, *_ = G.csr()
+    kinds = G.kinds
+    reached = bytearray(len(G))
+    stack = [n for n in range(len(G)) if kinds[n] == NodeKind.Start]
+    for n in stack:
+        reached[n] = 1
+    while stack:
+        n = stack.pop()
+        for succ in successors[offsets[n]:offsets[n+1]]:
+            if not reached[succ]:
+                reached[succ] = 1
+                stack.append(succ)
+    return [n for n in range(len(G)) if not reached[n] and kinds[n] != NodeKind.End]
+
+
+#dead are the unreachable nodes of G and loops its loop structure, when they are already known
+def graphIssues(G:CFG,arena:Arena,dead=None,loops=None) -> Iterator[Issue]:
+    if dead is None:
+        dead = unreachable(G)
+    for n in dead:
+        yield Issue(IssueType.Warning,arena[G.elems[n]],"Unreachable Code")
+    # while can be if, its condition isn't on any cycle
+    if loops is None:
+        loops = Loops(G)
+    dead = set(dead)
+    for n in range(len(G)):
+        if G.kinds[n] == NodeKind.Loop and n not in dead and not loops.cyclic[n]:
+            yield Issue(IssueType.Info,arena[G.elems[n]],"This should be an If contion")
+
+
+#variables read before they are assigned, values never read and variables that could be constants, found with reaching
+#definitions and liveness over G, index has the declaration of each use
+def dataflowIssues(G:CFG,arena:Arena,index:SymbolIndex,dead=None) -> Iterator[Issue]:
+    accesses = Accesses(G,arena,index)
+    if not accesses.declarations:
+        return
+    if dead is None:
+        dead = unreachable(G)
+    dead = set(dead)
+    reaching = reachingDefinitions(accesses).inputs
+    live = liveness(accesses).inputs
+    for n,bit,variable in accesses.reads:
+        if n in dead:
             continue
-        visited.add(succ)
-        if succ.endswith('E'):
+        found = reaching[n] & accesses.definitions[bit]
+        if found and found & accesses.unassigned == found:
+            yield Issue(IssueType.Warning,variable,f"Variable '{variable.symbol}' is used before being assigned")
+        elif found & accesses.unassigned:
+            yield Issue(IssueType.Warning,variable,f"Variable '{variable.symbol}' may be used before being assigned")
+    # a variable only declared is already reported as never used, arguments are assigned by the caller
+    for node,bit,elem,assigned in accesses.sites:
+        if assigned and node not in dead and accesses.accessed[bit] > 1 and not live[node] >> bit & 1 and not isinstance(elem,FunctionArg):
+            declaration = accesses.declarations[bit]
+            name = declaration.name if isinstance(declaration,FunctionArg) else declaration.variable
+            yield Issue(IssueType.Warning,elem,f"Value assigned to '{name}' is never used")
+    for bit,declaration in enumerate(accesses.declarations):
+        if (isinstance(declaration,Declaration) and not declaration.const and declaration.value is not None
+                and accesses.definitions[bit].bit_count() == 1 and not accesses.modified >> bit & 1 and accesses.accessed[bit] > 1):
+            yield Issue(IssueType.Info,declaration,f"Variable '{declaration.variable}' never changes, it can be a const")
+
+
+#how many issues a parse reports, at most maxIssues and none after the first one of maxSeverity or worse
+#the first issue past that spends the budget and closes the generator of issues, so what comes after is never validated
+#with count the validation goes on to the end to count the issues suppressed, the graph is still skipped
+class Budget():
+    def __init__(self, maxIssues=None, maxSeverity:IssueType=None, count=False) -> None:
+        self.maxIssues = maxIssues
+        self.maxSeverity = maxSeverity
+        self.count = count
+        self.kept = 0
+        self.full = False
+        self.suppressed = 0  # issues found after the budget was full, only counted with count
+        self.spent = False
+
+    def take(self, issues) -> Iterator[Issue]:
+        issues = iter(issues)
+        try:
+            for issue in issues:
+                if self.full:
+                    self.spent = True
+                    if not self.count:
+                        return
+                    self.suppressed += 1
+                    continue
+                self.kept += 1
+                self.full = (self.maxIssues is not None and self.kept >= self.maxIssues) \
+                    or (self.maxSeverity is not None and issue.valueType.value >= self.maxSeverity.value)
+                yield issue
+        finally:
+            if hasattr(issues, "close"):
+                issues.close()
+
+
+#makes identical operands the same element, once the analysis is done so every issue keeps the element it is on
+#only operands without a variable or a call below them are shared, the same name can mean another symbol in another
+#scope, and only when nothing below them has an issue, an issue on a shared element would be counted once
+#statements and conditions are nodes of the CFG and keep their own element
+def shareOperands(program,errors) -> None:
+    shared = {}
+    clean = set()  # ids of the expressions that can be shared
+    for e in postorder(program,lambda e: e.children()):
+        if not isinstance(e,Expression):
             continue
-        if n == succ:
-            return True
-        nexts.extend(g.successors(succ))
-    return False
-    
+        for field in operandFields(type(e)):
+            v = getattr(e,field)
+            if isinstance(v,Expression):
+                if v.id in clean:
+                    setattr(e,field,shared.setdefault(v,v))
+            elif isinstance(v,(list,tuple)):
+                setattr(e,field,type(v)(shared.setdefault(o,o) if isinstance(o,Expression) and o.id in clean else o for o in v))
+        if (type(e) is not Variable and type(e) is not Function_call and e.id not in errors
+                and all(c.id in clean for c in e.children() if isinstance(c,Expression))):
+            clean.add(e.id)
+
+@functools.cache
+def operandFields(cls) -> list[str]:
+    return [s for c in cls.__mro__ for s in c.__dict__.get("__slots__",()) if s not in ("id","structuralHash")]
+
+
+def newContext() -> Context:
+    printFuntion = Function("print",[FunctionArg("text",ANY())],VOID(),Program([]))
+    c = Context()
+    c.declare_function(printFuntion)
+    return c
 
 
-def parse(input):
+#parser="earley" is slower but accepts comparisons inside lists without parentheses
+def parseProgram(input,parser="lalr",inline=True):
+    if parser == "lalr" and inline:
+        with inlineLock:
+            inlineTransformer.counter = Counter()
+            linguagem = getParser(parser,inlineTransformer).parse(input)
+            return linguagem,inlineTransformer.counter
 
-    p = Lark(lark_parser,start="program") # cria um objeto parser
+    p = getParser(parser) # cria um objeto parser
     tree = p.parse(input)  # retorna uma tree
     transformer = T()
     linguagem = transformer.transform(tree)
+    return linguagem,transformer.counter
+
+
+#incremental is an IncrementalParser that keeps the elements of unchanged top level items between calls
+#every element created during the analysis is looked up through its arena, dropped when parse returns
+#hashCons makes identical operands share one element once the analysis is done, see shareOperands
+#parallel validates the function bodies in worker processes
+#budget limits the issues, when it is spent the graph isn't finished, the svg is None and maxDepth only counts the loops built before
+#timings is filled with the seconds taken by each pass and each walk, see PassManager
+#draw=False returns the CFG in place of the svg, to be drawn later, see render.py
+def parse(input,parser="lalr",inline=True,incremental=None,hashCons=False,parallel=False,budget=None,timings=None,draw=True):
+    with Arena() as arena:
+        return analyse(arena,input,parser,inline,incremental,hashCons,parallel,budget,timings,draw)
+
+#the validation and the graph share a single walk over the program, the loops are found on the graph
+def analyse(arena,input,parser,inline,incremental,hashCons=False,parallel=False,budget=None,timings=None,draw=True):
+    if incremental is not None:
+        linguagem,counters = incremental.parse(input)
+    else:
+        linguagem,counters = parseProgram(input,parser,inline)
     
-    printFuntion = Function("print",[FunctionArg("text",ANY())],VOID(),Program([]))
-    
-    
-    c = Context()
-    
-    c.declare_function(printFuntion)
+    c = newContext()
 
     errors = defaultdict(set)
-    for i in linguagem.validate(c):
-        errors[i.elem.id].add(i)
-    G = pgv.AGraph(directed=True)
-    linguagem.append_to_graph(G,True)
-    html_content = G.draw(format='svg', prog='dot').decode()
-    
-    # unreachable code
-    s = list(filter(lambda x : len(G.in_edges(x)) == 0 and x.isnumeric() ,G.nodes()))
-    while s:
-        si = s.pop(0)
-        i = int(si)
-        errors[i].add(Issue(IssueType.Warning,Element.elems[i],"Unreachable Code"))
-        nexts = G.successors(si)
-        G.remove_node(si)
-        s.extend(list(filter(lambda x : len(G.in_edges(x)) == 0 and x.isnumeric() ,nexts)))
-    # while can be if 
-    s = list(filter(lambda x :x.attr['label'].startswith("while") ,G.nodes()))
-    for i in s:
-        if not isItsOwnSuccessor(G,i):
-            errors[int(i)].add(Issue(IssueType.Info,Element.elems[int(i)],"This should be an If contion"))
-    
+    def collect(issues):
+        if budget is not None:
+            issues = budget.take(issues)
+        for i in issues:
+            errors[i.elem.id].add(i)
+
+    passes = PassManager(timed=timings is not None)
+    if parallel:
+        from parallel import validateParallel
+        collect(validateParallel(linguagem,c,arena))
+    elif incremental is not None:
+        collect(incremental.validate(linguagem,c))
+    else:
+        passes.add(Validation(c))
+
+    G = None
+    if budget is None or not budget.spent:
+        G = CFG()
+        passes.add(ControlFlow(G,True))
+    collect(passes.run(linguagem))
+
+    html_content = None
+    maxDepth = 0
+    if G is not None:
+        loops = Loops(G)
+        maxDepth = loops.maxDepth
+        if budget is None or not budget.spent:
+            html_content = G.toAGraph().draw(format='svg', prog='dot').decode() if draw else G
+            dead = unreachable(G)
+            collect(graphIssues(G,arena,dead,loops))
+            collect(dataflowIssues(G,arena,c.index,dead))
+    if timings is not None:
+        timings.update(passes.times)
+    if hashCons and incremental is None:
+        shareOperands(linguagem,errors)
     
-    maxDepth = c.stats.maxLoops
-    counters = transformer.counter
     main_instructions = len(linguagem.instructions)
-    return (linguagem,errors,maxDepth,counters,main_instructions,html_content)
+    return (linguagem,errors,maxDepth,counters,main_instructions,html_content,c.index)
 
 if __name__ == '__main__':
     with open(sys.argv[1]) as f:
-        parse(f.read())
\ No newline at end of file
+        linguagem, errors, *_ = parse(f.read(),draw=False)  # only the diagnostics are printed
+    for i in sorted(errors):
+        for issue in errors[i]:
+            print(f"{issue.valueType.name}: {issue.msg} -> {str(issue.elem).strip().splitlines()[0]}")
\ No newline at end of file
@@ -0,0 +1,144 @@
+import os
+import re
+import subprocess
+import threading
+from html import escape
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from typing import Optional
+from language.cfg import CFG
+from parallel import getPool
+
+
+#graphviz runs as a child process that is killed when it takes longer than timeout seconds, a note is drawn instead
+#and also when prog isn't installed or fails
+def draw(G: CFG, prog='dot', timeout=None) -> str:
+    try:
+        return subprocess.run([prog, "-Tsvg"], input=G.toAGraph().to_string(), capture_output=True, text=True,
+                              timeout=timeout, check=True).stdout
+    except subprocess.TimeoutExpired:
+        return note(f"{len(G)} nodes, not drawn in {timeout:g}s")
+    except FileNotFoundError:
+        return note(f"{len(G)} nodes, not drawn, {prog} isn't installed")
+    except subprocess.CalledProcessError as e:
+        return note(f"{len(G)} nodes, not drawn, {prog} failed with code {e.returncode}")
+
+
+def note(text: str) -> str:
+    return (f'<svg width="300pt" height="30pt" viewBox="0 0 300 30" xmlns="http://www.w3.org/2000/svg">'
+            f'<rect width="300" height="30" fill="white"/><text x="5" y="20">{escape(text)}</text></svg>')
+
+
+#puts the svgs of the pieces one under the other in a single svg, sizes are in points like graphviz's
+#the ids of each piece are prefixed with its number so they stay unique
+def stitch(svgs: list[str], gap=10) -> str:
+    if len(svgs) == 1:
+        return svgs[0]
+    parts = []
+    width = height = 0
+    for i, svg in enumerate(svgs):
+        svg = svg[svg.index("<svg") + len("<svg"):]
+        end = svg.index(">")
+        root, body = svg[:end], svg[end:]
+        w = float(re.search(r'width="([\d.]+)pt"', root).group(1))
+        h = float(re.search(r'height="([\d.]+)pt"', root).group(1))
+        root = re.sub(r'(width|height)="([\d.]+)pt"', r'\1="\2"', root)  # in the units of the outer svg
+        parts.append(f'<svg x="0" y="{height:g}"' + root + body.replace(' id="', f' id="{i}_'))
+        width = max(width, w)
+        height += h + gap
+    height -= gap
+    return (f'<svg width="{width:g}pt" height="{height:g}pt" viewBox="0 0 {width:g} {height:g}" '
+            'xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink">\n' + "\n".join(parts) + "\n</svg>")
+
+
+#draws graphs in the background, each cluster is laid out on its own in worker processes and the pieces are stitched
+#svgs are content addressed, the key of a graph or a piece is its digest and nothing already drawn is drawn again,
+#so after an edit inside one function only that function is laid out
+#graphs with more than summaryLimit nodes are drawn as their summary, see CFG.summary, the whole graph of one of their
+#functions is drawn by submitFunction, pieces with more than fastLimit nodes are laid out by fastProg instead of dot
+#and no piece takes more than timeLimit seconds
+#the last keep drawings, keepGraphs graphs and keepPieces pieces are remembered
+class Renderer():
+    def __init__(self, workers=1, keep=64, keepGraphs=8, keepPieces=1024, processes=None,
+                 summaryLimit=2000, fastLimit=1000, fastProg="sfdp", timeLimit=30) -> None:
+        self.pool = ThreadPoolExecutor(workers, thread_name_prefix="render")
+        self.processes = processes
+        self.jobs = OrderedDict()    # key -> future of the svg
+        self.graphs = OrderedDict()  # key -> graph, to draw its functions
+        self.pieces = OrderedDict()  # key of a piece -> future of its svg
+        self.lock = threading.Lock()
+        self.keep = keep
+        self.keepGraphs = keepGraphs
+        self.keepPieces = keepPieces
+        self.summaryLimit = summaryLimit
+        self.fastLimit = fastLimit
+        self.fastProg = fastProg
+        self.timeLimit = timeLimit
+        self.drawn = 0  # pieces laid out so far
+
+    @staticmethod
+    def forget(cache: OrderedDict, keep: int) -> None:
+        while len(cache) > keep:
+            cache.popitem(last=False)
+
+    #starts drawing G unless it is already drawn or being drawn, returns its key
+    def submit(self, G: CFG) -> str:
+        key = G.digest()
+        with self.lock:
+            self.graphs[key] = G
+            self.graphs.move_to_end(key)
+            self.forget(self.graphs, self.keepGraphs)
+            if key in self.jobs:
+                self.jobs.move_to_end(key)
+            else:
+                self.jobs[key] = self.pool.submit(self.render, G)
+                self.forget(self.jobs, self.keep)
+        return key
+
+    #starts drawing the whole graph of the function name of the graph of key, returns the key of the drawing
+    #KeyError if the graph was forgotten or has no such function
+    def submitFunction(self, key: str, name: str) -> str:
+        job = f"{key}/{name}"
+        with self.lock:
+            if job in self.jobs:
+                self.jobs.move_to_end(job)
+                return job
+            G = self.graphs[key]
+            cluster = next((c for c, (n, _) in enumerate(G.clusters) if c > 0 and n == name), None)
+            if cluster is None:
+                raise KeyError(name)
+            self.jobs[job] = self.pool.submit(self.render, G, cluster)
+            self.forget(self.jobs, self.keep)
+        return job
+
+    def render(self, G: CFG, cluster=None) -> str:
+        if cluster is not None:
+            pieces = [G.split()[cluster]]
+        elif len(G) > self.summaryLimit:
+            pieces = [G.summary()]
+        else:
+            pieces = G.split()
+        jobs = []
+        with self.lock:
+            for piece in pieces:
+                key = piece.digest()
+                job = self.pieces.get(key)
+                if job is None:
+                    prog = self.fastProg if len(piece) > self.fastLimit else "dot"
+                    job = self.pieces[key] = getPool(self.processes or os.cpu_count()).submit(draw, piece, prog, self.timeLimit)
+                    self.drawn += 1
+                else:
+                    self.pieces.move_to_end(key)
+                jobs.append(job)
+            self.forget(self.pieces, self.keepPieces)
+        return stitch([job.result() for job in jobs])
+
+    #the svg of key, None while it is still being drawn, KeyError if it was never submitted or was forgotten
+    #errors of the drawing are raised here
+    def result(self, key: str, timeout=0) -> Optional[str]:
+        with self.lock:
+            job = self.jobs[key]
+        try:
+            return job.result(timeout)
+        except TimeoutError:
+            return None
@@ -0,0 +1,89 @@
+import sys
+import os
+import mmap
+from collections import Counter
+from typing import Iterator
+from incremental import topLevelSpans
+from parse import parseProgram, graphIssues, dataflowIssues, unreachable, newContext
+from language.issue import Issue
+from language.cfg import CFG, NodeKind, Loops
+from language.elements.element import Arena
+from language.elements.control import Function, Program
+from language.elements.passes import PassManager
+from language.elements.analyses import Validation, ControlFlow
+
+
+#analyses a file one top level statement at a time, without reading it whole
+#only the global symbols stay alive between statements, functions are kept without their body
+class Stream():
+    def __init__(self, path):
+        self.path = path
+        self.context = newContext()
+        self.declared = (len(self.context.variables), len(self.context.functions))
+        self.counters = Counter({'instructions': 1})
+        self.main_instructions = 0
+        self.reachable = True
+        self.depth = 0
+
+    def maxDepth(self) -> int:
+        return self.depth
+
+    def statements(self) -> Iterator[str]:
+        with open(self.path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                for start, end in topLevelSpans(m):
+                    text = m[start:end].decode()
+                    if text.strip():
+                        yield text
+
+    def issues(self) -> Iterator[Issue]:
+        for text in self.statements():
+            yield from self.statementIssues(text)
+        yield from Program.unusedIssues(self.context, self.declared)
+
+    #everything built for the statement is only referenced from here and is dropped when it ends
+    def statementIssues(self, text) -> list[Issue]:
+        issues = []
+        with Arena() as arena:
+            program, counter = parseProgram(text)
+            counter['instructions'] -= 1  # the program wrapping the statement
+            self.counters.update(counter)
+
+            for instruction in program.instructions:
+                self.main_instructions += 1
+
+                # the statement is linked to the previous one through START, like in the whole program graph
+                G = CFG()
+                start = G.node(-1, NodeKind.Start, "START")
+                end = G.node(-1, NodeKind.End, "END")
+                cfg = ControlFlow(G, end=end)
+                issues.extend(PassManager(Validation(self.context), cfg).run(instruction))
+                f, l = cfg.result()
+                if self.reachable:
+                    G.edge(start, f)
+                dead = unreachable(G)
+                loops = Loops(G)
+                self.depth = max(self.depth, loops.maxDepth)
+                issues.extend(graphIssues(G, arena, dead, loops))
+                issues.extend(dataflowIssues(G, arena, self.context.index, dead))
+                dead = set(dead)
+                self.reachable = any(p not in dead for p, _ in l)
+
+                if isinstance(instruction, Function):
+                    signature = Function(instruction.name, instruction.args, instruction.returnType, Program([]))
+                    self.context.declare_function(signature)
+                    self.context.index.define(signature, instruction)
+            self.context.clear_resolved()
+            self.context.index.clear()
+        return issues
+
+if __name__ == '__main__':
+    stream = Stream(sys.argv[1])
+    for issue in stream.issues():
+        print(f"{issue.valueType.name}: {issue.msg} -> {str(issue.elem).strip().splitlines()[0]}")
+    print(f"Max loops depth: {stream.maxDepth()}")
+    print(f"Main instructions: {stream.main_instructions}")
+    for k, v in (+stream.counters).items():
+        print(f"{k}: {v}")
@@ -0,0 +1,158 @@
+from parse import parse
+
+
+def diagnostics(text):
+    errors = parse(text, draw=False)[1]
+    return sorted((i.valueType.name, i.msg, str(i.elem)) for issues in errors.values() for i in issues)
+
+
+#the value before the if still reaches the return through the branch that doesn't assign
+def test_definition_killed_on_one_branch():
+    assert diagnostics("""
+func f(c : bool) : int {
+    var x : int = 0;
+    if (c) {
+        x = 1;
+    }
+    return x;
+}
+print(f(true));
+""") == []
+
+
+def test_definition_killed_on_both_branches():
+    assert diagnostics("""
+func f(c : bool) : int {
+    var x : int = 0;
+    if (c) {
+        x = 1;
+    } else {
+        x = 2;
+    }
+    return x;
+}
+print(f(true));
+""") == [("Warning", "Value assigned to 'x' is never used", "var x: int = 0")]
+
+
+def test_assigned_on_one_branch():
+    assert diagnostics("""
+func f(c : bool) : int {
+    var x : int;
+    if (c) {
+        x = 1;
+    }
+    return x;
+}
+func g(c : bool) : int {
+    var y : int;
+    if (c) {
+        y = 1;
+    } else {
+        y = 2;
+    }
+    return y;
+}
+func h() : int {
+    var z : int;
+    return z;
+}
+print(f(true) + g(true) + h());
+""") == [
+        ("Warning", "Variable 'x' may be used before being assigned", "x"),
+        ("Warning", "Variable 'z' is used before being assigned", "z"),
+    ]
+
+
+#last is read at the top of the loop, the value assigned at the bottom is live through the back edge
+def test_back_edge_keeps_value_live():
+    assert diagnostics("""
+func f(n : int) : int {
+    var i : int = 0;
+    var last : int = 0;
+    while (i < n) {
+        print(last);
+        last = i;
+        i = i + 1;
+    }
+    return 0;
+}
+print(f(3));
+""") == []
+
+
+#only the back edge brings an assignment, the first iteration reads nothing
+def test_back_edge_assigns_after_first_iteration():
+    assert diagnostics("""
+func f(n : int) : int {
+    var i : int = 0;
+    var last : int;
+    while (i < n) {
+        print(last);
+        last = i;
+        i = i + 1;
+    }
+    return 0;
+}
+print(f(3));
+""") == [("Warning", "Variable 'last' may be used before being assigned", "last")]
+
+
+#without a read after it in the loop, the assignment is dead on every path
+def test_assignment_in_loop_never_read():
+    assert diagnostics("""
+func f(n : int) : int {
+    var i : int = 0;
+    var last : int = 0;
+    while (i < n) {
+        last = i;
+        i = i + 1;
+    }
+    return i;
+}
+print(f(3));
+""") == [
+        ("Warning", "Value assigned to 'last' is never used", "last = i"),
+        ("Warning", "Value assigned to 'last' is never used", "var last: int = 0"),
+    ]
+
+
+def test_dead_stores():
+    assert diagnostics("""
+func f() : int {
+    var x : int = 1;
+    x = 2;
+    x = 3;
+    return x;
+}
+print(f());
+""") == [
+        ("Warning", "Value assigned to 'x' is never used", "var x: int = 1"),
+        ("Warning", "Value assigned to 'x' is never used", "x = 2"),
+    ]
+
+
+#a variable only written reports every value, one only declared is reported once as a symbol
+def test_never_read():
+    assert diagnostics("""
+func f() {
+    var z : int = 1;
+    z = 2;
+    var w : int;
+}
+f();
+""") == [
+        ("Warning", "Symbol 'w' is never used", "var w: int"),
+        ("Warning", "Value assigned to 'z' is never used", "var z: int = 1"),
+        ("Warning", "Value assigned to 'z' is never used", "z = 2"),
+    ]
+
+
+def test_never_changes():
+    assert diagnostics("""
+func f() : int {
+    var k : int = 4;
+    return k * k;
+}
+print(f());
+""") == [("Info", "Variable 'k' never changes, it can be a const", "var k: int = 4")]
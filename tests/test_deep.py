@@ -0,0 +1,22 @@
+from parse import parse
+
+DEPTH = 2000  # twice the default recursion limit
+
+
+def issues(text):
+    errors = parse(text, draw=False)[1]
+    return sorted(i.msg for issues in errors.values() for i in issues)
+
+
+#each elif is an If in the else of the previous one, so every branch is a scope deeper
+#print is looked up as a variable first, a miss that goes through every scope above
+def test_deep_elif_chain():
+    text = "func f(a : int) {\nif (a == 0) { print(a); }\n"
+    text += "".join(f"elif (a == {i}) {{ print(a); }}\n" for i in range(1, DEPTH))
+    text += "else { print(b); }\n}\nf(1);\n"
+    assert issues(text) == ["Undefined Variable"]
+
+
+def test_deep_sum():
+    text = "const a : int = 1;\nprint(" + " + ".join(["a"] * DEPTH) + ");\n"
+    assert issues(text) == []
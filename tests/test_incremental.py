@@ -0,0 +1,102 @@
+import pytest
+from lark.exceptions import LarkError
+from parse import parse, Budget
+from incremental import IncrementalParser, splitTopLevel
+
+
+def diagnostics(result):
+    return sorted((i.valueType.name, i.msg, str(i.elem)) for issues in result[1].values() for i in issues)
+
+
+#diagnostics, depth, counters and number of instructions, compared with a whole parse of the same text
+def check(parser, text):
+    result = parse(text, incremental=parser, draw=False)
+    full = parse(text, draw=False)
+    assert diagnostics(result) == diagnostics(full)
+    assert result[2:5] == full[2:5]
+    return result
+
+
+def test_split_top_level():
+    text = ('var a : int = 1;\n'
+            'if (a == 1) { print("};"); } elif (a == 2) { } else { }\n'
+            'func f() { /* } */ }\n'
+            'do { a = 2; } while (a < 1);\n'
+            '// ;\nwhile (a < 1) { }\n'
+            'print(a);')
+    assert splitTopLevel(text) == [
+        'var a : int = 1;',
+        '\nif (a == 1) { print("};"); } elif (a == 2) { } else { }',
+        '\nfunc f() { /* } */ }',
+        '\ndo { a = 2; } while (a < 1);',
+        '\n// ;\nwhile (a < 1) { }',
+        '\nprint(a);',
+    ]
+
+
+#identical items can't share elements, each one keeps its own ids
+def test_repeated_items():
+    parser = IncrementalParser()
+    text = "var a : int = 1;\nprint(a);\nprint(a);\nprint(a);\n"
+    program = check(parser, text)[0]
+    ids = [i.id for i in program.instructions]
+    assert len(set(ids)) == 4
+    program = check(parser, text.replace("print(a);\n", "", 1))[0]
+    assert len({i.id for i in program.instructions}) == 3
+    program = check(parser, text + "print(a);\n")[0]
+    assert len({i.id for i in program.instructions}) == 5
+
+
+#the split is only a guess, a broken file raises the error of a whole parse and the next parse starts over
+def test_fallback_after_error():
+    parser = IncrementalParser()
+    text = "var a : int = 1;\nfunc f() { print(a); }\nprint(a);\n"
+    check(parser, text)
+    broken = text.replace("print(a); }", "print(a; }")
+    with pytest.raises(LarkError) as incremental:
+        parse(broken, incremental=parser, draw=False)
+    with pytest.raises(LarkError) as full:
+        parse(broken, draw=False)
+    assert type(incremental.value) is type(full.value)
+    assert parser.order is None
+    check(parser, text)
+    check(parser, text.replace("print(a);\n", "var b : int = a;\n"))
+
+
+#the budget closes the validation between items, the items after it are validated by the next parse
+def test_budget_stops_between_items():
+    parser = IncrementalParser()
+    text = 'print("a" + 1);\nprint("b" + 2);\nprint("c" + 3);\n'
+    budget = Budget(1)
+    errors = parse(text, incremental=parser, draw=False, budget=budget)[1]
+    assert budget.spent and budget.kept == 1
+    assert [str(i.elem) for issues in errors.values() for i in issues] == ['"a"']
+    assert [item.issues is None for item in parser.order] == [False, False, True]
+    check(parser, text)
+
+
+F = "func f(x : int) : int { return x + a; }\n"
+CALLERS = "var b : int = f(a);\nprint(b);\nf(a);\n"
+
+#each text is an edit of the one before, the callers are left as they are and pick up the changes they depend on
+EDITS = [
+    ("var a : int = 1;\n" + F + CALLERS, []),
+    ("var a : int = 1;\n" + F + "var a : int = 2;\n" + CALLERS, ["Symbol already declared"]),
+    ("var a : int = 1;\n" + F + "func f(x : int) : int { return x; }\n" + CALLERS, ["Redefinition of symbol 'f'"]),
+    ("var a : int = 1;\n" + F + CALLERS, []),
+    ("var a : int = 1;\nfunc f(x : string) : int { return a; }\n" + CALLERS,
+        ["Argument has wrong type. string expected but got int instead"] * 2),
+    ("var a : int = 1;\nfunc f(x : int, y : int) : int { return x + y; }\n" + CALLERS,
+        ["Wrong Number of arguments,  2 expected but 1 where given"] * 2),
+    ("var a : int = 1;\nfunc f(x : int) : bool { return x == a; }\n" + CALLERS, []),
+    (F + CALLERS, ["Argument has wrong type. int expected but got None instead"] * 2 + ["Undefined Variable"] * 3),
+    ("var a : int = 1;\nf(a);\n", ["Undefined Function"]),
+    ("var a : int = 1;\n" + F + CALLERS, []),
+]
+
+
+def test_edits_match_full_parse():
+    parser = IncrementalParser()
+    for text, errors in EDITS:
+        result = check(parser, text)
+        assert sorted(msg for kind, msg, _ in diagnostics(result) if kind == "Error") == sorted(errors)
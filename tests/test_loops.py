@@ -0,0 +1,103 @@
+import random
+from language.cfg import CFG, Loops, NodeKind
+
+
+#a graph of n nodes, node 0 is the START and the rest are statements
+def graph(n, edges):
+    G = CFG()
+    G.node(-1, NodeKind.Start, "")
+    for _ in range(n - 1):
+        G.node(-1, NodeKind.Statement, "")
+    for a, b in edges:
+        G.edge(a, b)
+    return G
+
+
+#the dominators of each node as sets, intersected over the predecessors until nothing changes
+#the START hangs from a virtual root len(G), the nodes it doesn't reach have no dominator
+def naiveIdom(G):
+    n = len(G)
+    root = n
+    predecessors = [list(G.predecessors(v)) for v in range(n)] + [[]]
+    predecessors[0].append(root)
+    reached = {root}
+    work = [root]
+    while work:
+        v = work.pop()
+        for w in (range(n) if v == root else G.successors(v)):
+            if w not in reached and (v != root or w == 0):
+                reached.add(w)
+                work.append(w)
+    dom = {v: set(reached) for v in reached}
+    dom[root] = {root}
+    changed = True
+    while changed:
+        changed = False
+        for v in reached - {root}:
+            new = {v} | set.intersection(*(dom[p] for p in predecessors[v] if p in reached))
+            if new != dom[v]:
+                dom[v] = new
+                changed = True
+    idom = [-1] * (n + 1)
+    idom[root] = root
+    for v in reached - {root}:
+        idom[v] = max(dom[v] - {v}, key=lambda d: len(dom[d]))
+    return idom, dom
+
+
+def checkDominators(G):
+    loops = Loops(G)
+    idom, dom = naiveIdom(G)
+    assert loops.idom == idom
+    for b in dom:
+        for a in dom:
+            assert loops.dominates(a, b) == (a in dom[b])
+    return loops
+
+
+#a and b are both entered from 0, the cycle between them has no header
+def test_irreducible():
+    G = graph(4, [(0, 1), (0, 2), (1, 2), (2, 1), (1, 3), (2, 3)])
+    loops = checkDominators(G)
+    assert loops.idom[1] == loops.idom[2] == 0
+    assert loops.cyclic[1] and loops.cyclic[2]
+    assert loops.headers == [] and loops.maxDepth == 0
+
+
+#a loop 2 <-> 3 inside an irreducible cycle 1 <-> 4 entered at both ends
+def test_loop_inside_irreducible():
+    G = graph(6, [(0, 1), (0, 4), (1, 2), (2, 3), (3, 2), (3, 4), (4, 1), (4, 5)])
+    loops = checkDominators(G)
+    assert loops.headers == [2]
+    assert loops.header[3] == 2 and loops.depth[3] == 1 and loops.maxDepth == 1
+
+
+#three loops, each the body of the one before: 1 -> 2 -> 3 -> 4 with back edges 4 -> 3, 5 -> 2 and 6 -> 1
+def test_nested():
+    G = graph(8, [(0, 1), (1, 2), (2, 3), (3, 4), (4, 3), (3, 5), (5, 2), (2, 6), (6, 1), (1, 7)])
+    loops = checkDominators(G)
+    assert loops.headers == [1, 2, 3]
+    assert [loops.header[v] for v in range(8)] == [-1, -1, 1, 2, 3, 2, 1, -1]
+    assert [loops.depth[v] for v in range(8)] == [0, 1, 2, 3, 3, 2, 1, 0]
+    assert loops.maxDepth == 3
+
+
+#the end of a long elif chain, every condition branches to a body that jumps to the same node
+def test_many_branch_join():
+    branches = 500
+    edges = []
+    for i in range(branches):
+        condition, body = 1 + 2 * i, 2 + 2 * i
+        edges += [(condition - 2 if i else 0, condition), (condition, body), (body, 2 * branches + 1)]
+    edges.append((2 * branches - 1, 2 * branches + 1))
+    G = graph(2 * branches + 2, edges)
+    loops = checkDominators(G)
+    assert loops.idom[2 * branches + 1] == 1
+
+
+def test_random_graphs():
+    rng = random.Random(0)
+    for _ in range(300):
+        n = rng.randint(2, 20)
+        edges = [(rng.randrange(n), rng.randrange(1, n)) for _ in range(rng.randint(1, 3 * n))]
+        checkDominators(graph(n, edges))
@@ -0,0 +1,72 @@
+import glob
+import os
+import pytest
+from parse import parse, parseProgram, newContext, Budget
+
+HERE = os.path.dirname(__file__)
+EXAMPLES = sorted(glob.glob(os.path.join(HERE, "*.ea")))
+
+#the same name declared in two functions, and a global both read and written
+SCOPES = """
+var g : int = 0;
+func f() : int {
+    var x : int = 1;
+    return x + g;
+}
+func h() : int {
+    var x : int = 2;
+    g = x + g;
+    return x + g;
+}
+print(f() + h());
+"""
+
+#identical operands, with and without issues
+REPEATED = """
+print(("a" + 1) * 2);
+print(("a" + 1) * 2);
+var b : int = (3 * 4) + (3 * 4);
+print(b);
+"""
+
+
+def diagnostics(text, **options):
+    errors = parse(text, draw=False, **options)[1]
+    return sorted((i.valueType.name, i.msg, str(i.elem)) for issues in errors.values() for i in issues)
+
+
+#the issues of each element, in the order the elements were made, and the counters
+def issueMap(text, **options):
+    _, errors, maxDepth, counters, *_ = parse(text, draw=False, **options)
+    byElement = [sorted((i.valueType.name, i.msg, str(i.elem)) for i in errors[id]) for id in sorted(errors)]
+    return byElement, maxDepth, counters
+
+
+def read(path):
+    with open(path) as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("text", [read(path) for path in EXAMPLES] + [SCOPES, REPEATED], ids=[os.path.basename(p) for p in EXAMPLES] + ["scopes", "repeated"])
+def test_hash_consing_keeps_diagnostics(text):
+    assert issueMap(text, hashCons=True) == issueMap(text)
+
+
+def test_hash_consing_shares_clean_operands():
+    program = parse(REPEATED, draw=False, hashCons=True)[0]
+    left, right = program.instructions[2].value.children()
+    assert left is right
+    first, second = (i.args[0].children()[0] for i in program.instructions[:2])
+    assert first is not second
+
+
+#validation finds more than one issue, so the budget is spent before the graph
+def test_budget_counts_suppressed():
+    text = read(os.path.join(HERE, "do.ea"))
+    found = len(list(parseProgram(text)[0].validate(newContext())))
+    assert found > 1
+    budget = Budget(1, count=True)
+    errors, _, _, _, svg, _ = parse(text, draw=False, budget=budget)[1:]
+    assert sum(map(len, errors.values())) == budget.kept == 1
+    assert budget.spent and budget.suppressed == found - 1
+    assert svg is None
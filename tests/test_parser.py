@@ -0,0 +1,25 @@
+import glob
+import os
+import pytest
+from parse import parseProgram
+
+EXAMPLES = sorted(glob.glob(os.path.join(os.path.dirname(__file__), "*.ea")))
+
+
+#the lalr grammar is a rewrite of the earley one, both must build the same program
+@pytest.mark.parametrize("path", EXAMPLES, ids=os.path.basename)
+def test_lalr_matches_earley(path):
+    with open(path) as f:
+        text = f.read()
+    lalr, lalrCounter = parseProgram(text, parser="lalr")
+    earley, earleyCounter = parseProgram(text, parser="earley")
+    assert lalr == earley
+    assert str(lalr) == str(earley)
+    assert lalrCounter == earleyCounter
+
+
+@pytest.mark.parametrize("path", EXAMPLES, ids=os.path.basename)
+def test_inline_matches_tree(path):
+    with open(path) as f:
+        text = f.read()
+    assert parseProgram(text, inline=True)[0] == parseProgram(text, inline=False)[0]
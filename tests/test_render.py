@@ -0,0 +1,16 @@
+import os
+import pytest
+from parse import parse
+
+pytest.importorskip("pygraphviz")
+from render import draw
+
+HERE = os.path.dirname(__file__)
+
+
+#the page shows a note in place of the graph when graphviz can't draw it
+def test_missing_layout_program_draws_a_note():
+    with open(os.path.join(HERE, "fib.ea")) as f:
+        G = parse(f.read(), draw=False)[5]
+    svg = draw(G, prog="no-such-graphviz-program")
+    assert svg.startswith("<svg") and "no-such-graphviz-program isn&#x27;t installed" in svg
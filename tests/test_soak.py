@@ -0,0 +1,42 @@
+import gc
+import os
+import resource
+import tracemalloc
+from parse import parse
+from incremental import IncrementalParser
+from language.elements import types
+
+HERE = os.path.dirname(__file__)
+
+
+#the frontend parses the file again on every reload, what one parse leaves behind adds up for as long as the server runs
+#every reload declares a new symbol, of one of a few types, and renders the program like the frontend
+#tracemalloc sees what python allocates, the peak RSS also catches what lark, re or the arrays allocate natively
+def test_reloads_keep_memory_flat():
+    with open(os.path.join(HERE, "teste.ea")) as f:
+        text = f.read()
+    incremental = IncrementalParser()
+
+    def reload(i):
+        nested = "[" * (i % 5 + 1) + "int" + "]" * (i % 5 + 1)
+        linguagem, errors, *_ = parse(text + f"\nvar soak_reload_number_{i} : {nested};\nprint(soak_reload_number_{i});",
+                                      incremental=incremental, draw=False)
+        linguagem.toHTML(errors)
+
+    tracemalloc.start()
+    try:
+        for i in range(50):
+            reload(i)
+        gc.collect()
+        warm = tracemalloc.get_traced_memory()[0]
+        warmRss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        for i in range(50, 350):
+            reload(i)
+        gc.collect()
+        grown = tracemalloc.get_traced_memory()[0] - warm
+        grownRss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - warmRss  # KiB on linux
+    finally:
+        tracemalloc.stop()
+    assert grown < 16 * 1024
+    assert grownRss < 4 * 1024
+    assert len(types.internedTypes) < 20
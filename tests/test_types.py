@@ -0,0 +1,19 @@
+import gc
+from language.elements.types import INT, CHAR, ARRAY, LIST, TUPLE, internedTypes
+
+
+def test_types_are_interned():
+    assert ARRAY(INT()) is ARRAY(INT())
+    assert TUPLE([INT(), CHAR()]) is TUPLE([INT(), CHAR()])
+    assert ARRAY(INT()) is not LIST(INT())
+
+
+#INT lives as long as the program, comparing it with a type mustn't keep that type alive
+def test_types_only_used_in_a_comparison_are_forgotten():
+    integer = INT()
+    assert not integer.isAssignableFrom(LIST(ARRAY(LIST(CHAR()))))
+    assert integer.isAssignableFrom(CHAR())
+    gc.collect()
+    assert (LIST, ARRAY(LIST(CHAR()))) not in internedTypes
+    assert (ARRAY, LIST(CHAR())) not in internedTypes
+    assert integer.isAssignableFrom(CHAR())
@@ -0,0 +1,32 @@
+import sys
+from parse import parse, Budget
+from language.issue import IssueType
+
+
+#first issues of each file, for going through many broken files
+#the limit is a number of issues or the name of a severity, validation stops once it is reached
+#with count validation goes on to count the issues left out, which takes as long as a full validation
+def triage(limit, files, count=False) -> None:
+    for file in files:
+        budget = Budget(int(limit), count=count) if limit.isdigit() else Budget(maxSeverity=IssueType[limit], count=count)
+        with open(file) as f:
+            _, errors, *_ = parse(f.read(), budget=budget, draw=False)
+        print(f"{file}:")
+        for i in sorted(errors):
+            for issue in errors[i]:
+                print(f"  {issue.valueType.name}: {issue.msg} -> {str(issue.elem).strip().splitlines()[0]}")
+        if budget.spent and count:
+            print(f"  stopped after {budget.kept} issues, {budget.suppressed} more suppressed")
+        elif budget.spent:
+            print(f"  stopped after {budget.kept} issues, more were suppressed")
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    count = "--count" in args
+    if count:
+        args.remove("--count")
+    if len(args) < 2:
+        print(f"usage: python3 triage.py [--count] <max issues|{'|'.join(t.name for t in IssueType)}> <file>...")
+        sys.exit(2)
+    triage(args[0], args[1:], count)